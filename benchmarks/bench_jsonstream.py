@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Compares whole-document and streaming decoding of large trade payloads.
+
+Each mode runs in separate process so peak RSS is measured independently. Payload is either a recorded response
+(--payload FILE, e.g. saved Bitstamp transactions/?time=day or LakeBTC bctrades body) or a generated one with
+the same record layout. Results are printed as JSON."""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _generate_payload(path, count):
+    now = int(time.time())
+    price = 4000.0
+    with open(path, 'w') as file:
+        file.write('[')
+        for i in range(count):
+            price += random.gauss(0, 2)
+            trade = {
+                'date': str(now - count + i),
+                'tid': str(i),
+                'price': '{:.2f}'.format(price),
+                'amount': '{:.8f}'.format(random.random()),
+                'type': str(i % 2),
+            }
+            if i:
+                file.write(', ')
+            file.write(json.dumps(trade))
+        file.write(']')
+
+
+def _read_chunks(path):
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _decode_whole(path):
+    import numpy as np
+    body = b''.join(_read_chunks(path))
+    transactions = json.loads(body.decode('utf-8'))
+    count = len(transactions)
+    times = np.fromiter((float(t['date']) for t in transactions), dtype=float, count=count)
+    prices = np.fromiter((float(t['price']) for t in transactions), dtype=float, count=count)
+    amounts = np.fromiter((float(t['amount']) for t in transactions), dtype=float, count=count)
+    return times, prices, amounts
+
+
+def _decode_stream(path):
+    from btcwidget import jsonstream
+    return jsonstream.read_columns(_read_chunks(path), ['date', 'price', 'amount'])
+
+
+_MODES = {
+    'whole': _decode_whole,
+    'stream': _decode_stream,
+}
+
+
+def _run_mode(mode, path, step):
+    from btcwidget.resample import ohlcv
+    import numpy  # exclude import from measurement
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    times, prices, amounts = _MODES[mode](path)
+    parse_sec = time.perf_counter() - start
+    candles = ohlcv(times, prices, amounts, step)
+    total_sec = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) * 1024
+    del times, prices, amounts, candles
+
+    # second pass for allocation tracking which slows decoding down considerably
+    tracemalloc.start()
+    _MODES[mode](path)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'mode': mode,
+        'parse_sec': parse_sec,
+        'aggregate_sec': total_sec - parse_sec,
+        'peak_rss_growth_bytes': peak_rss_growth,
+        'peak_alloc_bytes': peak_alloc,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payload', help='recorded JSON array of trades')
+    parser.add_argument('--records', type=int, default=200000, help='number of generated trades')
+    parser.add_argument('--step', type=int, default=432, help='candle size in seconds')
+    parser.add_argument('--mode', choices=_MODES.keys(), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, args.payload, args.step)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = args.payload
+        if not path:
+            path = os.path.join(tmp_dir, 'trades.json')
+            _generate_payload(path, args.records)
+        results = []
+        for mode in _MODES:
+            output = subprocess.check_output([sys.executable, __file__, '--mode', mode, '--payload', path,
+                                              '--step', str(args.step)])
+            results.append(json.loads(output.decode('utf-8')))
+        report = {
+            'payload_bytes': os.path.getsize(path),
+            'results': results,
+        }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Measures ticker() and graph() of every exchange provider against local replay server (replay_server.py).
+
+Server runs in separate process so its work is not included in allocation statistics. Each operation is first
+called once (cold, e.g. BitBay trade history is paginated from scratch) and then repeatedly; reported are cold call
+time, throughput and p50/p90/p99 latency of repeated calls. Allocations are measured with tracemalloc in separate
+pass because tracing slows the code down. Results are printed as JSON; with --baseline FILE (earlier output) p50
+ratios against it are included so regressions stand out."""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+_BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_BENCH_DIR))
+
+import btcwidget.exchanges
+from btcwidget.transport import transport
+
+from replay_server import HOSTS
+
+_RESOLUTION = 100
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def _start_server(args):
+    cmd = [sys.executable, os.path.join(_BENCH_DIR, 'replay_server.py'), '--trades', str(args.trades),
+           '--period', str(args.period), '--latency', str(args.latency)]
+    if args.recordings:
+        cmd += ['--recordings', args.recordings]
+    server = subprocess.Popen(cmd, stdout=subprocess.PIPE, universal_newlines=True)
+    base_url = server.stdout.readline().strip()
+    if not base_url:
+        server.kill()
+        raise RuntimeError('replay server failed to start')
+    for host in HOSTS:
+        transport.redirect(host, base_url)
+    return server
+
+
+def _get_operations(provider, market, period):
+    operations = [
+        ('ticker', lambda: provider.ticker(market)),
+        ('graph', lambda: provider.graph(market, period, _RESOLUTION)),
+        # incremental update as done by update thread after first fetch
+        ('graph_since', lambda: provider.graph(market, period, _RESOLUTION, since=time.time() - period / 10)),
+    ]
+    if provider.supports_batch_ticker():
+        operations.append(('tickers', lambda: provider.tickers(provider.get_markets())))
+    return operations
+
+
+def _count_requests():
+    return sum(s['requests'] for s in transport.stats().values())
+
+
+def _measure(func, iterations):
+    requests_before = _count_requests()
+    start = time.perf_counter()
+    func()
+    cold = time.perf_counter() - start
+
+    durations = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - call_start)
+    total = time.perf_counter() - start
+    return {
+        'cold_ms': cold * 1000,
+        'calls_per_sec': iterations / total,
+        'p50_ms': _percentile(durations, 50) * 1000,
+        'p90_ms': _percentile(durations, 90) * 1000,
+        'p99_ms': _percentile(durations, 99) * 1000,
+        'requests_per_call': (_count_requests() - requests_before) / (iterations + 1),
+    }
+
+
+def _measure_allocations(func, iterations):
+    """Returns peak traced memory above baseline during single call (median and max over iterations)"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return {'alloc_peak_kb_p50': _percentile(peaks, 50) / 1024, 'alloc_peak_kb_max': max(peaks) / 1024}
+
+
+def _run(args):
+    results = {}
+    exchanges = args.exchange or [id for id in btcwidget.exchanges.factory.list()
+                                  if btcwidget.exchanges.factory.info(id).provider]
+    for exchange in exchanges:
+        provider = btcwidget.exchanges.factory.get(exchange)
+        market = provider.get_markets()[0]
+        for name, func in _get_operations(provider, market, args.period):
+            print('{} {}...'.format(exchange, name), file=sys.stderr)
+            result = _measure(func, args.iterations)
+            result.update(_measure_allocations(func, args.alloc_iterations))
+            results.setdefault(exchange, {})[name] = result
+    return results
+
+
+def _compare(results, baseline):
+    ratios = {}
+    for exchange, ops in results.items():
+        for name, result in ops.items():
+            base = baseline.get('results', {}).get(exchange, {}).get(name)
+            if base and base['p50_ms']:
+                ratios.setdefault(exchange, {})[name] = result['p50_ms'] / base['p50_ms']
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exchange', action='append', help='exchange id (default: all real exchanges)')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--alloc-iterations', type=int, default=5)
+    parser.add_argument('--trades', type=int, default=20000, help='size of generated trade history')
+    parser.add_argument('--period', type=int, default=24 * 3600, help='graph period in seconds')
+    parser.add_argument('--latency', type=float, default=0.0, help='server-side delay per response in ms')
+    parser.add_argument('--recordings', help='directory with recorded response bodies, see replay_server.py')
+    parser.add_argument('--baseline', help='earlier output of this script to compare with')
+    parser.add_argument('--verbose', action='store_true', help='show provider and transport diagnostics')
+    args = parser.parse_args()
+
+    server = _start_server(args)
+    try:
+        # providers print diagnostics to stdout which is reserved for results
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(sys.stderr if args.verbose else devnull):
+            results = _run(args)
+    finally:
+        server.terminate()
+        server.wait()
+        transport.close()
+
+    output = {
+        'params': {k: getattr(args, k) for k in ('iterations', 'alloc_iterations', 'trades', 'period', 'latency')},
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            output['p50_vs_baseline'] = _compare(results, json.load(file))
+    print(json.dumps(output, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Local HTTP stand-in for exchange REST APIs used by providers.
+
+Serves ticker and graph/trades endpoints of all supported exchanges from one port (paths do not collide). Responses
+are generated in each exchange's format from a synthetic trade history, or taken from recorded bodies: with
+--recordings DIR a file named after the route (e.g. bitstamp.transactions.json, see ROUTES) replaces the generated
+body of that route. Latency and payload size are configurable so transport and parsing costs can be measured
+without network.
+
+Point providers at the server with btcwidget.transport.transport.redirect(host, url) for every host in HOSTS."""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HOSTS = ['api.bitfinex.com', 'www.bitstamp.net', 'bitbay.net', 'www.bitmarket.pl', 'api.lakebtc.com']
+
+# route name -> path pattern
+ROUTES = [
+    ('bitfinex.ticker', r'/v2/ticker/t\w+'),
+    ('bitfinex.tickers', r'/v2/tickers'),
+    ('bitfinex.candles', r'/v2/candles/trade:\w+:t\w+/hist'),
+    ('bitstamp.ticker', r'/api/v2/ticker/\w+/'),
+    ('bitstamp.transactions', r'/api/v2/transactions/\w+/'),
+    ('bitbay.ticker', r'/API/Public/\w+/ticker\.json'),
+    ('bitbay.trades', r'/API/Public/\w+/trades\.json'),
+    ('bitmarket.ticker', r'/json/\w+/ticker\.json'),
+    ('bitmarket.graph', r'/graphs/\w+/\w+\.json'),
+    ('lakebtc.ticker', r'/api_v2/ticker'),
+    ('lakebtc.bctrades', r'/api_v2/bctrades'),
+]
+
+# trades returned by one BitBay trades.json request
+_BITBAY_PAGE_SIZE = 50
+_TIME_PARAMS = {'minute': 60, 'hour': 3600, 'day': 24 * 3600}
+
+
+class _History:
+    """Synthetic trade history: (date, tid, price, amount) tuples sorted by time, spread over period_sec"""
+
+    def __init__(self, count, period_sec):
+        now = int(time.time())
+        price = 4000.0
+        self.trades = []
+        for i in range(count):
+            price = max(price + random.gauss(0, 2), 1.0)
+            date = now - period_sec + int(period_sec * i / count)
+            self.trades.append((date, i + 1, round(price, 2), round(random.random(), 8)))
+        self.last = price
+
+    def since_time(self, since_time):
+        return [t for t in self.trades if t[0] >= since_time]
+
+    def candles(self, step, count):
+        """Returns newest count candles as (time, open, close, high, low, volume)"""
+        candles = {}
+        for date, _, price, amount in self.trades:
+            key = date - date % step
+            if key not in candles:
+                candles[key] = [key, price, price, price, price, 0.0]
+            c = candles[key]
+            c[2] = price
+            c[3] = max(c[3], price)
+            c[4] = min(c[4], price)
+            c[5] += amount
+        return [candles[k] for k in sorted(candles)][-count:]
+
+
+class _Responder:
+    """Builds response bodies for routes"""
+
+    # time-based queries (e.g. LakeBTC 'at') change every second
+    _MAX_CACHED = 1000
+
+    def __init__(self, history, recordings_dir):
+        self._history = history
+        self._recorded = {}
+        if recordings_dir:
+            for name, _ in ROUTES:
+                path = os.path.join(recordings_dir, name + '.json')
+                if os.path.isfile(path):
+                    with open(path, 'rb') as file:
+                        self._recorded[name] = file.read()
+        self._cache = {}
+
+    def respond(self, name, path, query):
+        if name in self._recorded:
+            return self._recorded[name]
+        # generated bodies only depend on route, path and query so they are built once
+        key = (name, path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+        if key not in self._cache:
+            if len(self._cache) >= self._MAX_CACHED:
+                self._cache.clear()
+            self._cache[key] = json.dumps(getattr(self, '_' + name.replace('.', '_'))(path, query)).encode('utf-8')
+        return self._cache[key]
+
+    def _bitfinex_ticker(self, path, query):
+        last = self._history.last
+        return [last - 0.1, 10.0, last + 0.1, 10.0, 12.3, 0.003, last, 15000.0, last + 50, last - 50]
+
+    def _bitfinex_tickers(self, path, query):
+        symbols = query.get('symbols', ['tBTCUSD'])[0].split(',')
+        return [[symbol] + self._bitfinex_ticker(path, query) for symbol in symbols]
+
+    def _bitfinex_candles(self, path, query):
+        period = path.split(':')[1]
+        units = {'m': 60, 'h': 3600, 'D': 24 * 3600, 'M': 30 * 24 * 3600}
+        step = int(period[:-1]) * units[period[-1]]
+        count = int(query.get('limit', ['100'])[0])
+        # Bitfinex returns newest candles first
+        return list(reversed(self._history.candles(step, count)))
+
+    def _bitstamp_ticker(self, path, query):
+        return {'last': '{:.2f}'.format(self._history.last), 'volume': '1500.0', 'timestamp': str(int(time.time()))}
+
+    def _bitstamp_transactions(self, path, query):
+        window = _TIME_PARAMS[query.get('time', ['hour'])[0]]
+        trades = self._history.since_time(time.time() - window)
+        return [{'date': str(d), 'tid': str(tid), 'price': '{:.2f}'.format(p), 'amount': '{:.8f}'.format(a),
+                 'type': str(tid % 2)} for d, tid, p, a in reversed(trades)]
+
+    def _bitbay_ticker(self, path, query):
+        return {'last': self._history.last, 'volume': 150.0}
+
+    def _bitbay_trades(self, path, query):
+        trades = self._history.trades
+        if 'since' in query:
+            since_tid = int(query['since'][0])
+            page = [t for t in trades if t[1] > since_tid][:_BITBAY_PAGE_SIZE]
+        else:
+            page = list(reversed(trades[-_BITBAY_PAGE_SIZE:]))
+        return [{'date': d, 'price': p, 'type': 'buy' if tid % 2 else 'sell', 'amount': a, 'tid': str(tid)}
+                for d, tid, p, a in page]
+
+    def _bitmarket_ticker(self, path, query):
+        return {'last': self._history.last, 'volume': 150.0}
+
+    def _bitmarket_graph(self, path, query):
+        period = path.rsplit('/', 1)[1][:-len('.json')]
+        steps = {'90m': 60, '6h': 300, '1d': 900, '7d': 3600}
+        candles = self._history.candles(steps.get(period, 24 * 3600), 10000)
+        return [{'time': t, 'open': '{:.2f}'.format(o), 'high': '{:.2f}'.format(h), 'low': '{:.2f}'.format(l),
+                 'close': '{:.2f}'.format(c), 'vol': '{:.8f}'.format(v)} for t, o, c, h, l, v in candles]
+
+    def _lakebtc_ticker(self, path, query):
+        last = self._history.last
+        return {'btcusd': {'last': '{:.2f}'.format(last), 'bid': last - 0.1, 'ask': last + 0.1, 'volume': 150.0},
+                'btceur': {'last': '{:.2f}'.format(last * 0.85), 'bid': None, 'ask': None, 'volume': 12.0}}
+
+    def _lakebtc_bctrades(self, path, query):
+        trades = self._history.trades
+        if 'at' in query:
+            trades = self._history.since_time(int(query['at'][0]))
+        return [{'date': d, 'price': p, 'amount': a, 'tid': tid} for d, tid, p, a in trades]
+
+
+def create_server(port=0, trades=20000, period_sec=24 * 3600, latency_ms=0.0, recordings_dir=None):
+    """Creates server (not started yet). Actual port is available in server.server_address."""
+    responder = _Responder(_History(trades, period_sec), recordings_dir)
+    routes = [(name, re.compile(pattern + '$')) for name, pattern in ROUTES]
+
+    class Handler(BaseHTTPRequestHandler):
+        # keep-alive like real exchange servers so client connection pooling is exercised
+        protocol_version = 'HTTP/1.1'
+        # send headers and body in one segment, otherwise delayed ACK adds ~40 ms to every response
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            name = next((n for n, r in routes if r.match(url.path)), None)
+            if not name:
+                self.send_error(404)
+                return
+            body = responder.respond(name, url.path, parse_qs(url.query))
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer(('127.0.0.1', port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--trades', type=int, default=20000, help='size of generated trade history')
+    parser.add_argument('--period', type=int, default=24 * 3600, help='time span of generated history in seconds')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay added to every response in ms')
+    parser.add_argument('--recordings', help='directory with recorded response bodies named <route>.json')
+    args = parser.parse_args()
+    server = create_server(args.port, args.trades, args.period, args.latency, args.recordings)
+    # first line is read by bench_providers.py
+    print('http://127.0.0.1:{}'.format(server.server_address[1]), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Local WebSocket stand-in for exchange push feeds.
+
+Replays recorded messages (JSON lines file, one message per line) to every client after it sends its subscribe
+request. Without --messages a built-in sample in the exchange's message format is used.
+
+With --check the server is started in-process, provider's WS_URL is pointed at it and ticks received through
+provider's ticker_stream() are printed. Exit status is non-zero if fewer than expected ticks were received."""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_SAMPLE_MESSAGES = {
+    'bitfinex.com': [
+        {'event': 'info', 'version': 2, 'serverId': 'replay', 'platform': {'status': 1}},
+        {'event': 'subscribed', 'channel': 'ticker', 'chanId': 1, 'symbol': 'tBTCUSD', 'pair': 'BTCUSD'},
+        [1, [4010.1, 12.5, 4010.2, 9.1, 12.3, 0.0031, 4010.2, 15321.7, 4050.0, 3950.0]],
+        [1, 'hb'],
+        [1, [4011.0, 10.2, 4011.1, 8.3, 13.2, 0.0033, 4011.1, 15330.2, 4050.0, 3950.0]],
+        [1, [4009.4, 11.0, 4009.5, 7.7, 11.6, 0.0029, 4009.5, 15341.9, 4050.0, 3950.0]],
+    ],
+    'bitstamp.net': [
+        {'event': 'bts:subscription_succeeded', 'channel': 'live_trades_btcusd', 'data': {}},
+        {'event': 'trade', 'channel': 'live_trades_btcusd',
+         'data': {'id': 1, 'timestamp': '1500000000', 'amount': 0.1, 'price': 4010.2, 'type': 0}},
+        {'event': 'trade', 'channel': 'live_trades_btcusd',
+         'data': {'id': 2, 'timestamp': '1500000001', 'amount': 0.5, 'price': 4011.1, 'type': 1}},
+        {'event': 'trade', 'channel': 'live_trades_btcusd',
+         'data': {'id': 3, 'timestamp': '1500000002', 'amount': 0.2, 'price': 4009.5, 'type': 0}},
+    ],
+}
+
+
+def _load_messages(path):
+    with open(path, 'r') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def _create_handler(messages, interval, close_after):
+    async def handler(ws, path=None):
+        # wait for subscribe request
+        await ws.recv()
+        for message in messages:
+            await ws.send(message)
+            await asyncio.sleep(interval)
+        if close_after:
+            await ws.close()
+        else:
+            await ws.wait_closed()
+    return handler
+
+
+async def _check(exchange, port, count):
+    import btcwidget.exchanges
+    provider = btcwidget.exchanges.factory.get(exchange)
+    provider.WS_URL = 'ws://127.0.0.1:{}'.format(port)
+    prices = []
+    try:
+        async for price in provider.ticker_stream(provider.get_markets()[0]):
+            print('{} tick: {}'.format(exchange, price))
+            prices.append(price)
+            if len(prices) >= count:
+                break
+    except Exception as e:
+        # server closed connection - provider reports disconnect
+        print('{} stream disconnected: {}'.format(exchange, e))
+    return prices
+
+
+async def _main(args):
+    messages = _load_messages(args.messages) if args.messages else \
+        [json.dumps(m) for m in _SAMPLE_MESSAGES[args.exchange]]
+    handler = _create_handler(messages, args.interval, bool(args.check))
+    async with websockets.serve(handler, '127.0.0.1', args.port) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        if not args.check:
+            print('Replaying {} messages on ws://127.0.0.1:{}'.format(len(messages), port))
+            await asyncio.Future()
+        prices = await _check(args.exchange, port, args.check)
+    return len(prices) >= args.check
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exchange', choices=_SAMPLE_MESSAGES.keys(), default='bitfinex.com')
+    parser.add_argument('--messages', help='recorded messages, one JSON message per line')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--interval', type=float, default=0.1, help='delay between messages in seconds')
+    parser.add_argument('--check', type=int, default=0, metavar='TICKS',
+                        help='connect provider stream and expect given number of ticks')
+    args = parser.parse_args()
+    ok = asyncio.run(_main(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
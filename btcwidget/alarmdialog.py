@@ -2,6 +2,7 @@ import sys
 
 from gi.repository import Gtk
 
+import btcwidget.alarms
 import btcwidget.currency
 import btcwidget.exchanges
 from btcwidget.config import config
@@ -92,14 +93,14 @@ class AlarmDialog(Gtk.Dialog):
 
     def _build_row(self, alarm):
         alarm = alarm.copy()
-        provider = btcwidget.exchanges.factory.get(alarm['exchange']) if alarm['exchange'] else None
+        exchange_info = btcwidget.exchanges.factory.info(alarm['exchange']) if alarm['exchange'] else None
         currency = alarm['market'][3:] if alarm['market'] else 'USD'
         price_str = btcwidget.currency.service.format_price(alarm['price'], currency) if alarm['price'] else '?'
         if alarm['type'] == 'B':
             trigger = 'Below {}'.format(price_str)
         else:
             trigger = 'Above {}'.format(price_str)
-        exchange_name = provider.get_name() if provider else '?'
+        exchange_name = exchange_info.name if exchange_info else '?'
         market_name = alarm['market'] if alarm['market'] else '?'
         return [exchange_name, market_name, trigger, alarm]
 
@@ -167,8 +168,8 @@ class AlarmDialog(Gtk.Dialog):
     def _create_market_combo(self):
         store = Gtk.ListStore(str, str, str)
         for market_config in config['markets']:
-            provider = btcwidget.exchanges.factory.get(market_config['exchange'])
-            market_name = '{} - {}'.format(provider.get_name(), market_config['market'])
+            exchange_name = btcwidget.exchanges.factory.info(market_config['exchange']).name
+            market_name = '{} - {}'.format(exchange_name, market_config['market'])
             store.append([market_name, market_config['exchange'], market_config['market']])
         combo = Gtk.ComboBox.new_with_model(store)
         renderer_text = Gtk.CellRendererText()
@@ -192,7 +193,7 @@ class AlarmDialog(Gtk.Dialog):
             alarm = row[self._DATA_COL]
             if alarm['exchange'] and alarm['market'] and alarm['price']:
                 alarms.append(alarm)
-        config['alarms'] = alarms
+        btcwidget.alarms.index.replace(alarms)
         config.save()
 
 
@@ -0,0 +1,59 @@
+import bisect
+import threading
+
+from btcwidget.config import config
+
+
+class _AlarmIndex:
+    """Alarms from config grouped by (exchange, market) with thresholds kept sorted so triggered alarms are found
+    with bisect. config['alarms'] must be replaced through replace() so index and config are changed together."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._above = None
+        self._below = None
+
+    def replace(self, alarms):
+        """Sets config['alarms'] and rebuilds index atomically with respect to pop_triggered()"""
+        with self._lock:
+            config['alarms'] = alarms
+            self._build()
+
+    def _build(self):
+        above, below = {}, {}
+        for alarm in config['alarms']:
+            alarms = above if alarm['type'] == 'A' else below
+            alarms.setdefault((alarm['exchange'], alarm['market']), []).append(alarm)
+        self._above = {key: self._sort(alarms) for key, alarms in above.items()}
+        self._below = {key: self._sort(alarms) for key, alarms in below.items()}
+
+    @staticmethod
+    def _sort(alarms):
+        alarms = sorted(alarms, key=lambda a: a['price'])
+        return [a['price'] for a in alarms], alarms
+
+    def pop_triggered(self, exchange, market, price):
+        """Returns list of alarms triggered by current price. Triggered alarms are removed from index and config."""
+        key = (exchange, market)
+        triggered = []
+        with self._lock:
+            if self._above is None:
+                self._build()
+            if key in self._above:
+                prices, alarms = self._above[key]
+                i = bisect.bisect_right(prices, price)
+                triggered += alarms[:i]
+                del prices[:i], alarms[:i]
+            if key in self._below:
+                prices, alarms = self._below[key]
+                i = bisect.bisect_left(prices, price)
+                triggered += alarms[i:]
+                del prices[i:], alarms[i:]
+            if triggered:
+                triggered_ids = set(id(a) for a in triggered)
+                # replace whole list so readers never see partially updated alarms
+                config['alarms'] = [a for a in config['alarms'] if id(a) not in triggered_ids]
+        return triggered
+
+
+index = _AlarmIndex()
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from btcwidget.series import Series
+from definitions import ROOT_DIR
+
+
+class _CandleCache:
+    """On-disk graph candle store keyed by exchange, market and resolution (candle step in seconds)"""
+
+    _PATH = os.path.join(ROOT_DIR, 'candles.cache.sqlite')
+    # old candles of all markets (including removed ones) are deleted and file is compacted this often
+    _MAINTENANCE_SEC = 60 * 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db = None
+        # first store after start cleans up after previous runs
+        self._maintenance_time = 0
+
+    def _get_db(self):
+        if not self._db:
+            self._db = sqlite3.connect(self._PATH, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS candles ('
+                             'exchange TEXT, market TEXT, resolution INTEGER, time REAL, '
+                             'open REAL, high REAL, low REAL, close REAL, volume REAL, '
+                             'PRIMARY KEY (exchange, market, resolution, time)) WITHOUT ROWID')
+        return self._db
+
+    def load(self, exchange, market, resolution, since_time):
+        """Returns Series with stored candles newer than since_time"""
+        with self._lock:
+            rows = self._get_db().execute(
+                'SELECT time, open, high, low, close, volume FROM candles '
+                'WHERE exchange = ? AND market = ? AND resolution = ? AND time > ? ORDER BY time',
+                (exchange, market, resolution, since_time)).fetchall()
+        data = np.array(rows, dtype=float).reshape(-1, len(Series.COLUMNS))
+        return Series.from_columns(*data.T)
+
+    def store(self, exchange, market, resolution, series, min_time):
+        """Stores candles from series replacing existing ones with the same time. Candles of the market older than
+        min_time are removed in all resolutions, so candles of resolutions used before are dropped once they leave
+        graph period. Periodically the same is done for all markets and the file is compacted."""
+        rows = zip(series.time.tolist(), series.open.tolist(), series.high.tolist(), series.low.tolist(),
+                   series.close.tolist(), series.volume.tolist())
+        key = (exchange, market, resolution)
+        with self._lock:
+            db = self._get_db()
+            with db:
+                db.executemany('INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key + row for row in rows))
+                db.execute('DELETE FROM candles WHERE exchange = ? AND market = ? AND time <= ?',
+                           (exchange, market, min_time))
+            if time.time() >= self._maintenance_time + self._MAINTENANCE_SEC:
+                self._maintain(db, min_time)
+
+    def _maintain(self, db, min_time):
+        # graph period is common for all markets - candles older than min_time are not used by any market
+        with db:
+            db.execute('DELETE FROM candles WHERE time <= ?', (min_time,))
+        db.execute('VACUUM')
+        self._maintenance_time = time.time()
+
+
+cache = _CandleCache()
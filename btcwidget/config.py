@@ -1,5 +1,11 @@
+import atexit
 import json
 import os
+import stat
+import sys
+import tempfile
+import threading
+import time
 
 from definitions import ROOT_DIR
 
@@ -45,18 +51,48 @@ class _Config(dict):
         # time axis in minutes
         'time_axis_div': 1,
         'dark_theme': False,
+        # keep main window hidden at startup, it can be opened from indicator menu
+        'start_minimized': False,
+        # local port serving Prometheus text metrics on /metrics, None disables it
+        'metrics_port': None,
         'markets': _DEFAULT_MARKETS,
         'alarm_currency': 'USD',
         'alarm_above': None,
         'alarm_below': None,
         'alarms': [],
+        # HTTP keep-alive connections kept per exchange host
+        'http_pool_size': 2,
+        'http_connect_timeout_sec': 5,
+        'http_read_timeout_sec': 15,
+        # size of thread pool running blocking provider calls
+        'fetch_workers': 4,
+        'fetch_concurrency_per_exchange': 2,
+        # overrides of providers' default request budgets, e.g. {"bitbay.net": 30}
+        'exchange_requests_per_min': {},
+        # use push feeds for tickers where available, polling is used while stream is disconnected
+        'streaming_ticker': False,
+        'stream_retry_sec': 30,
     }
 
     CONFIG_PATH = os.path.join(ROOT_DIR, 'config.json')
+    # changes are collected and written at most once per this period
+    _SAVE_DEBOUNCE_SEC = 2
+    # delay before writing again after failed write
+    _SAVE_RETRY_SEC = 30
+    # mode of newly created config file
+    _NEW_FILE_MODE = 0o644
 
     def __init__(self):
         dict.__init__(self, self._DEFAULT)
         self._callbacks = []
+        self._save_cond = threading.Condition()
+        # JSON snapshot waiting for writer thread, None if there are no unsaved changes
+        self._pending_json = None
+        self._writer_thread = None
+        self._write_lock = threading.Lock()
+        self._saved_json = None
+        self._market_index = {}
+        self._rebuild_market_index()
 
     def load(self):
         if _MOCK:
@@ -65,25 +101,104 @@ class _Config(dict):
             return
         with open(self.CONFIG_PATH, 'r') as config_file:
             self.update(json.load(config_file))
+        self._saved_json = self._serialize()
+        self._rebuild_market_index()
 
     def save(self):
+        """Schedules writing config to disk. Can be called from any thread. Config is serialized on calling thread,
+        right after the caller changed it, so writer thread never reads values being modified."""
         if _MOCK:
             return
-        config_json = json.dumps(self, indent=4)
-        with open(self.CONFIG_PATH, 'w') as config_file:
-            config_file.write(config_json)
+        with self._save_cond:
+            self._pending_json = self._serialize()
+            if not self._writer_thread:
+                self._writer_thread = threading.Thread(target=self._writer_loop, name='config-writer', daemon=True)
+                self._writer_thread.start()
+            self._save_cond.notify()
+
+    def flush(self):
+        """Writes pending changes immediately"""
+        # held while snapshot is taken so concurrent flushes write snapshots in order they were saved
+        with self._write_lock:
+            with self._save_cond:
+                config_json, self._pending_json = self._pending_json, None
+            if config_json is None or config_json == self._saved_json:
+                return
+            try:
+                self._write(config_json)
+            except Exception:
+                # keep changes for next attempt unless newer ones were saved meanwhile
+                with self._save_cond:
+                    if self._pending_json is None:
+                        self._pending_json = config_json
+                raise
+            self._saved_json = config_json
+
+    def _writer_loop(self):
+        while True:
+            with self._save_cond:
+                while self._pending_json is None:
+                    self._save_cond.wait()
+            time.sleep(self._SAVE_DEBOUNCE_SEC)
+            try:
+                self.flush()
+            except Exception as e:
+                print('Failed to save config: {}'.format(e), file=sys.stderr)
+                time.sleep(self._SAVE_RETRY_SEC)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print('Failed to save config: {}'.format(e), file=sys.stderr)
+
+    def _serialize(self):
+        return json.dumps(dict(self), indent=4)
+
+    def _write(self, config_json):
+        # write to temporary file and rename it so config is never left partially written
+        fd, tmp_path = tempfile.mkstemp(prefix='.config.', suffix='.tmp', dir=os.path.dirname(self.CONFIG_PATH))
+        try:
+            # mkstemp creates file readable only by owner - keep mode of replaced file
+            try:
+                mode = stat.S_IMODE(os.stat(self.CONFIG_PATH).st_mode)
+            except FileNotFoundError:
+                mode = self._NEW_FILE_MODE
+            os.chmod(tmp_path, mode)
+            with os.fdopen(fd, 'w') as config_file:
+                config_file.write(config_json)
+                config_file.flush()
+                os.fsync(config_file.fileno())
+            os.replace(tmp_path, self.CONFIG_PATH)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        if key == 'markets':
+            self._rebuild_market_index()
 
     def register_change_callback(self, func):
         self._callbacks.append(func)
 
     def run_change_callbacks(self):
+        self._rebuild_market_index()
         for func in self._callbacks:
             func()
 
+    def _rebuild_market_index(self):
+        self._market_index = {get_market_id(mc): (mc, i) for i, mc in enumerate(self['markets'])}
+
     def get_market_by_id(self, market_id):
+        """Returns (market_config, index) tuple or None. Lookup index is rebuilt when markets are replaced, entries
+        not matching current market list (list modified in place) are looked up by scanning the list."""
         markets = self['markets']
+        entry = self._market_index.get(market_id)
+        if entry and entry[1] < len(markets) and markets[entry[1]] is entry[0]:
+            return entry
         for i, market_config in enumerate(markets):
-            if market_id == get_market_id(market_config):
+            if get_market_id(market_config) == market_id:
                 return market_config, i
         return None
 
@@ -93,3 +208,4 @@ def get_market_id(market_config):
 
 
 config = _Config()
+atexit.register(config._flush_at_exit)
@@ -1,52 +1,92 @@
 import json
 import os
 import requests
+import sys
+import threading
 import time
 
 from definitions import ROOT_DIR
 
 
 class _CurrencyService:
+    """Serves currency conversions from in-memory cross-rate table. Rates are loaded from cache file at start and
+    refreshed from Internet in background thread, so conversions never wait for network."""
+
     _CACHE_PATH = os.path.join(ROOT_DIR, 'currency.cache.json')
+    # rates are refreshed when they get older than this
+    _MAX_AGE_SEC = 12 * 3600
+    _CHECK_INTERVAL_SEC = 15 * 60
+    _RETRY_INTERVAL_SEC = 60
 
     def __init__(self):
         self._data = None
+        self._cross_rates = {}
+        self._currencies = []
+        self._refresh_thread = None
 
-    def _get_current_date(self):
-        return time.strftime('%Y-%m-%d')
+    def start(self, refresh=True):
+        """Loads cached rates and starts background refresh (unless refresh is False, e.g. in replay)"""
+        self._load_cache()
+        if refresh and not self._refresh_thread:
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name='currency-refresh', daemon=True)
+            self._refresh_thread.start()
 
-    def _load(self):
-        # try load from cache
-        if os.path.isfile(self._CACHE_PATH):
+    def _load_cache(self):
+        if not os.path.isfile(self._CACHE_PATH):
+            return
+        try:
             with open(self._CACHE_PATH, 'r') as file:
-                self._data = json.load(file)
-                # check if data is new enough
-                if self._data['fetch_date'] == self._get_current_date():
-                    return
-        # fetch data from Internet
+                self._set_data(json.load(file))
+        except (ValueError, KeyError) as e:
+            print('Invalid currency cache: {}'.format(e), file=sys.stderr)
+
+    def _is_stale(self):
+        return not self._data or time.time() - self._data.get('fetch_time', 0) > self._MAX_AGE_SEC
+
+    def _refresh_loop(self):
+        while True:
+            interval = self._CHECK_INTERVAL_SEC
+            if self._is_stale():
+                try:
+                    self._fetch()
+                except Exception as e:
+                    # keep using last known rates
+                    print('Failed to fetch currency exchange rates: {}'.format(e), file=sys.stderr)
+                    interval = self._RETRY_INTERVAL_SEC
+            time.sleep(interval)
+
+    def _fetch(self):
         print("Fetching currency exchange rates...")
-        resp = requests.get('http://api.fixer.io/latest')
+        resp = requests.get('http://api.fixer.io/latest', timeout=30)
         resp.raise_for_status()
-        self._data = resp.json()
-        self._data['fetch_date'] = self._get_current_date()
+        data = resp.json()
+        data['fetch_time'] = time.time()
+        self._set_data(data)
         # update cache
-        data_json = json.dumps(self._data, indent=4)
+        data_json = json.dumps(data, indent=4)
         with open(self._CACHE_PATH, 'w') as file:
             file.write(data_json)
 
+    def _set_data(self, data):
+        rates = dict(data['rates'])
+        rates[data['base']] = 1.0
+        cross_rates = {(a, b): rates[b] / rates[a] for a in rates for b in rates}
+        # single assignments so readers in other threads always see consistent tables
+        self._cross_rates = cross_rates
+        self._currencies = list(rates.keys())
+        self._data = data
+
     def convert(self, value, from_currency, to_currency):
-        if not self._data:
-            self._load()
-        if from_currency != self._data['base']:
-            value /= self._data['rates'][from_currency]
-        if to_currency != self._data['base']:
-            value *= self._data['rates'][to_currency]
-        return value
+        """Returns converted value or None if rates are not available yet"""
+        if from_currency == to_currency:
+            return value
+        rate = self._cross_rates.get((from_currency, to_currency))
+        if rate is None:
+            return None
+        return value * rate
 
     def list(self):
-        if not self._data:
-            self._load()
-        return [self._data['base']] + list(self._data['rates'].keys())
+        return list(self._currencies)
 
     def format_price(self, price, currency):
         if currency == 'USD':
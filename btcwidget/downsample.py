@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def m4_indices(x, y, width):
+    """Returns sorted indices of points worth plotting on chart width pixels wide: first, last, minimum and maximum
+    point of every pixel column (M4 aggregation). Line through them is rasterized almost the same as line through
+    all points, so spikes stay visible. x must be sorted. All indices are returned if there are few points."""
+    count = len(x)
+    if count <= 4 * width:
+        return np.arange(count)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x[-1] <= x[0]:
+        return np.array([0, count - 1])
+
+    columns = np.minimum(((x - x[0]) * (width / (x[-1] - x[0]))).astype(np.int64), width - 1)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], count] - 1
+    segments = np.repeat(np.arange(len(starts)), ends - starts + 1)
+
+    # NaN prices are ignored by fmin/fmax
+    min_indices = _first_in_segments(np.flatnonzero(y == np.fmin.reduceat(y, starts)[segments]), segments)
+    max_indices = _first_in_segments(np.flatnonzero(y == np.fmax.reduceat(y, starts)[segments]), segments)
+    return np.unique(np.concatenate([starts, ends, min_indices, max_indices]))
+
+
+def _first_in_segments(positions, segments):
+    """Keeps first of sorted positions falling into each segment"""
+    position_segments = segments[positions]
+    return positions[np.r_[True, position_segments[1:] != position_segments[:-1]]]
@@ -0,0 +1,120 @@
+"""Exchange provider registry.
+
+Providers are described by ExchangeInfo metadata so exchange lists, names and markets are available without
+importing provider modules. Provider module is imported and provider instantiated on first factory.get() of given
+exchange, so only configured exchanges are loaded.
+
+Third-party packages can add providers through 'btcwidget.exchanges' entry points. Each entry point must refer
+to ExchangeInfo instance (kept in lightweight module), e.g. in setup.py:
+
+    entry_points={'btcwidget.exchanges': ['example.com = example_btc.info:EXAMPLE_INFO']}
+"""
+import importlib
+import sys
+import threading
+from collections import namedtuple
+
+# 'markets' - list of 6-letters market codes built from two ISO 4217 currency codes
+# 'capabilities' - set of: 'batch_ticker' (tickers() is supported), 'candles' (graph from exchange candles),
+#                  'trades' (graph aggregated from trades), 'streaming' (push ticker feed),
+#                  'derived' (markets computed from other markets by update thread, no provider)
+# 'provider' - 'module:ClassName' of btcwidget.exchanges.base.ExchangeProvider subclass, None for derived markets
+ExchangeInfo = namedtuple('ExchangeInfo', ['id', 'name', 'markets', 'capabilities', 'provider'])
+
+ENTRY_POINT_GROUP = 'btcwidget.exchanges'
+
+_BUILTIN_EXCHANGES = [
+    ExchangeInfo('bitbay.net', 'BitBay.net', ['BTCPLN'], frozenset({'trades'}),
+                 'btcwidget.exchanges.bitbay:BitBayExchangeProvider'),
+    ExchangeInfo('bitmarket.pl', 'BitMarket.pl', ['BTCPLN'], frozenset({'candles'}),
+                 'btcwidget.exchanges.bitmarket:BitMarketExchangeProvider'),
+    ExchangeInfo('bitstamp.net', 'Bitstamp.net', ['BTCUSD'], frozenset({'trades', 'streaming'}),
+                 'btcwidget.exchanges.bitstamp:BitstampExchangeProvider'),
+    ExchangeInfo('bitfinex.com', 'Bitfinex.com', ['BTCUSD'], frozenset({'candles', 'batch_ticker', 'streaming'}),
+                 'btcwidget.exchanges.bitfinex:BitfinexExchangeProvider'),
+    ExchangeInfo('lakebtc.com', 'LakeBTC.com', ['BTCUSD'], frozenset({'trades', 'batch_ticker'}),
+                 'btcwidget.exchanges.lakebtc:LakeBTCExchangeProvider'),
+    # highest minus lowest price of all configured BTC markets converted to market currency (btcwidget.spread).
+    # Market currency is used rather than graph_currency so spread is displayed, converted to graph currency and
+    # checked by alarms like prices of any other market - spread/BTCUSD gives spreads in USD.
+    ExchangeInfo('spread', 'Spread', ['BTCUSD', 'BTCEUR', 'BTCPLN'], frozenset({'derived'}), None),
+]
+
+# provider used for testing, not listed in user interface
+_MOCK_EXCHANGE = ExchangeInfo('mock', 'Mock', ['BTCUSD'], frozenset({'candles'}),
+                              'btcwidget.exchanges.mock:MockProvider')
+
+
+def _iter_entry_points():
+    try:
+        import importlib.metadata as metadata
+    except ImportError:
+        # Python < 3.8
+        return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+    return entry_points.get(ENTRY_POINT_GROUP, [])
+
+
+class _ExchangeProviderFactory:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._infos = {}
+        self._listed_ids = []
+        self._cache = {}
+        self._plugins_loaded = False
+        for info in _BUILTIN_EXCHANGES:
+            self.register(info)
+        self.register(_MOCK_EXCHANGE, listed=False)
+
+    def register(self, info, listed=True):
+        """Adds provider described by ExchangeInfo. Provider module is not imported until it is needed."""
+        with self._lock:
+            self._infos[info.id] = info
+            if listed and info.id not in self._listed_ids:
+                self._listed_ids.append(info.id)
+
+    def _load_plugins(self):
+        with self._lock:
+            if self._plugins_loaded:
+                return
+            self._plugins_loaded = True
+            for entry_point in _iter_entry_points():
+                try:
+                    info = entry_point.load()
+                    if not isinstance(info, ExchangeInfo):
+                        raise TypeError('expected ExchangeInfo, got {}'.format(type(info).__name__))
+                except Exception as e:
+                    print('Failed to load exchange plugin {}: {}'.format(entry_point.name, e), file=sys.stderr)
+                    continue
+                self.register(info)
+
+    def info(self, id):
+        """Returns ExchangeInfo of given exchange"""
+        self._load_plugins()
+        info = self._infos.get(id)
+        if not info:
+            raise ValueError('Unknown exchange: {}'.format(id))
+        return info
+
+    def _create(self, info):
+        if not info.provider:
+            raise ValueError('Exchange {} has no provider'.format(info.id))
+        module_name, class_name = info.provider.split(':')
+        provider_class = getattr(importlib.import_module(module_name), class_name)
+        return provider_class()
+
+    def get(self, id):
+        with self._lock:
+            if id not in self._cache:
+                self._cache[id] = self._create(self.info(id))
+            return self._cache[id]
+
+    def list(self):
+        """Returns ids of exchanges which should be shown to user"""
+        self._load_plugins()
+        return list(self._listed_ids)
+
+
+factory = _ExchangeProviderFactory()
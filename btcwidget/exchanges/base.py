@@ -0,0 +1,112 @@
+import asyncio
+
+try:
+    import websockets
+except ImportError:
+    # streaming ticker is optional
+    websockets = None
+
+import btcwidget.exchanges
+from btcwidget import jsonstream
+from btcwidget.metrics import registry
+from btcwidget.transport import transport
+
+# market label is '*' for responses covering all markets of exchange
+_response_bytes = registry.counter('btcwidget_response_bytes_total', 'Downloaded response body bytes',
+                                   ['exchange', 'market'])
+_parse_seconds = registry.histogram('btcwidget_parse_seconds', 'JSON decoding time (for streamed responses '
+                                    'including body download)', ['exchange', 'market'])
+
+
+class ExchangeProvider:
+    """Exchange data provider interface. Subclasses are registered in btcwidget.exchanges with ExchangeInfo
+    metadata and instantiated by factory on first use."""
+
+    # registered exchange id
+    ID = None
+
+    _STREAM_CHUNK_SIZE = 64 * 1024
+    # smaller responses (by Content-Length, compressed size if compressed) are downloaded whole before decoding -
+    # saved memory does not matter for them and decoding in one piece is faster
+    _STREAM_MIN_BYTES = 1024 * 1024
+    # push feed endpoint, None if exchange has no streaming API
+    WS_URL = None
+    # polling budget shared by all markets of exchange, see btcwidget.scheduler
+    REQUESTS_PER_MIN = 60
+
+    def get_info(self):
+        return btcwidget.exchanges.factory.info(self.ID)
+
+    def get_name(self):
+        """Returns exchange name for use in user interface"""
+        return self.get_info().name
+
+    def get_markets(self):
+        """Returns list of supported market codes.
+        Each 6-letters code is built from two ISO 4217 currency codes used for trading."""
+        return list(self.get_info().markets)
+
+    def ticker(self, market):
+        """Returns current price"""
+        raise NotImplementedError()
+
+    def supports_batch_ticker(self):
+        return 'batch_ticker' in self.get_info().capabilities
+
+    def tickers(self, markets):
+        """Returns dict mapping market codes to current prices fetched with single request.
+        Only available if supports_batch_ticker() returns True."""
+        raise NotImplementedError()
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        """Returns graph data for given period as btcwidget.series.Series sorted by time (UTC timestamp).
+        If since timestamp is given only candles with time greater or equal to it are returned. Candle size
+        is still determined by period_seconds and resolution so result can be merged with earlier data."""
+        raise NotImplementedError()
+
+    def supports_ticker_stream(self):
+        return 'streaming' in self.get_info().capabilities and bool(self.WS_URL) and websockets is not None
+
+    async def ticker_stream(self, market):
+        """Async generator yielding prices pushed by exchange. Raises exception when connection is lost."""
+        raise NotImplementedError()
+        yield
+
+    async def async_ticker(self, market):
+        """Coroutine version of ticker(). By default blocking ticker() is run in event loop's default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.ticker, market)
+
+    async def async_tickers(self, markets):
+        """Coroutine version of tickers()"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.tickers, markets)
+
+    async def async_graph(self, market, period_seconds, resolution, since=None):
+        """Coroutine version of graph(). By default blocking graph() is run in event loop's default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.graph, market, period_seconds, resolution,
+                                                                since)
+
+    def _get_json(self, url, params=None, market='*'):
+        """market is used as metrics label"""
+        resp = transport.get(url, params)
+        resp.raise_for_status()
+        _response_bytes.inc(len(resp.content), exchange=self.ID, market=market)
+        with _parse_seconds.time(exchange=self.ID, market=market):
+            return resp.json()
+
+    def _get_json_columns(self, url, keys, params=None, market='*'):
+        """Streams JSON array of objects from url and returns list of float64 arrays with values of given keys.
+        Used for large payloads to avoid keeping whole decoded document in memory."""
+        with transport.get(url, params, stream=True) as resp:
+            resp.raise_for_status()
+            length = int(resp.headers.get('Content-Length') or 0)
+            with _parse_seconds.time(exchange=self.ID, market=market):
+                if 0 < length < self._STREAM_MIN_BYTES:
+                    chunks = [resp.content]
+                else:
+                    chunks = resp.iter_content(self._STREAM_CHUNK_SIZE)
+                return jsonstream.read_columns(self._count_bytes(chunks, market), keys)
+
+    def _count_bytes(self, chunks, market):
+        for chunk in chunks:
+            _response_bytes.inc(len(chunk), exchange=self.ID, market=market)
+            yield chunk
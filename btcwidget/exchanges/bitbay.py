@@ -0,0 +1,79 @@
+import time
+
+from btcwidget.exchanges.base import ExchangeProvider
+from btcwidget.resample import ohlcv
+from btcwidget.trades import TradeStore
+
+
+class BitBayExchangeProvider(ExchangeProvider):
+    ID = 'bitbay.net'
+    _TID_STEP = 300
+
+    def __init__(self):
+        self._trade_stores = {}
+
+    def ticker(self, market):
+        data = self._get_json('https://bitbay.net/API/Public/{}/ticker.json'.format(market), market=market)
+        return float(data['last'])
+
+    def _get_trade_store(self, market):
+        if market not in self._trade_stores:
+            self._trade_stores[market] = TradeStore()
+        return self._trade_stores[market]
+
+    def _load_trades(self, market, since_tid=None):
+        params = {}
+        if since_tid is not None:
+            params['since'] = since_tid
+        else:
+            params['sort'] = 'desc'
+        trades = self._get_json('https://bitbay.net/API/Public/{}/trades.json'.format(market), params, market)
+        if not trades:
+            return None
+        trades = [(int(t['date']), int(t['tid']), float(t['price']), float(t['amount'])) for t in trades]
+        min_tid, max_tid = min(t[1] for t in trades), max(t[1] for t in trades)
+
+        store = self._get_trade_store(market)
+        store.add(trades)
+        store.add_fetched_range(since_tid + 1 if since_tid is not None else min_tid, max_tid)
+        return min_tid, max_tid
+
+    def _load_trades_tid_range(self, market, since_tid, until_tid):
+        store = self._get_trade_store(market)
+        while True:
+            # skip pages which were already fetched
+            since_tid = store.next_missing_tid(since_tid + 1) - 1
+            if since_tid >= until_tid:
+                break
+            tids = self._load_trades(market, since_tid)
+            if not tids:
+                break
+            since_tid = tids[1]
+
+    def _load_trades_since_time(self, market, since_time):
+        store = self._get_trade_store(market)
+        max_tid = store.max_tid
+
+        # get newest and fill gap between them and already stored trades
+        tids = self._load_trades(market)
+        if tids and max_tid is not None:
+            self._load_trades_tid_range(market, max_tid, tids[0])
+
+        while store.min_time is not None and not store.covers(since_time) and store.min_tid > 1:
+            until_tid = store.min_tid
+            self._load_trades_tid_range(market, max(until_tid - self._TID_STEP, 0), until_tid)
+            if store.min_tid >= until_tid:
+                # no older trades
+                break
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        store = self._get_trade_store(market)
+        # the same cutoff for eviction and fetching so just evicted trades are not fetched again
+        min_time = time.time() - period_seconds
+        store.evict(min_time)
+        since_time = since if since else min_time
+        self._load_trades_since_time(market, since_time)
+
+        times, prices, amounts = store.range(since_time)
+        step = max(int(period_seconds / resolution), 1)
+        return ohlcv(times, prices, amounts, step).to_series()
@@ -0,0 +1,71 @@
+import json
+import time
+
+import numpy as np
+
+from btcwidget.exchanges.base import ExchangeProvider, websockets
+from btcwidget.series import Series
+
+
+class BitfinexExchangeProvider(ExchangeProvider):
+    ID = 'bitfinex.com'
+    WS_URL = 'wss://api-pub.bitfinex.com/ws/2'
+    # public REST endpoints are limited to 10-90 requests per minute depending on endpoint
+    REQUESTS_PER_MIN = 30
+
+    def ticker(self, market):
+        data = self._get_json('https://api.bitfinex.com/v2/ticker/t{}'.format(market), market=market)
+        return data[6]  # last price
+
+    def tickers(self, markets):
+        symbols = ','.join('t' + market for market in markets)
+        # [[SYMBOL, BID, BID_SIZE, ASK, ASK_SIZE, DAILY_CHANGE, DAILY_CHANGE_PERC, LAST_PRICE, ...], ...]
+        data = self._get_json('https://api.bitfinex.com/v2/tickers', {'symbols': symbols})
+        return {item[0][1:]: item[7] for item in data}
+
+    async def ticker_stream(self, market):
+        async with websockets.connect(self.WS_URL) as ws:
+            await ws.send(json.dumps({'event': 'subscribe', 'channel': 'ticker', 'symbol': 't' + market}))
+            async for message in ws:
+                data = json.loads(message)
+                if isinstance(data, dict):
+                    if data.get('event') == 'error':
+                        raise RuntimeError(data.get('msg'))
+                    continue
+                # [CHANNEL_ID, 'hb'] is heartbeat, [CHANNEL_ID, [BID, BID_SIZE, ASK, ASK_SIZE, ..., LAST_PRICE, ...]]
+                if isinstance(data[1], list):
+                    yield data[1][6]
+
+    def _convert_period(self, period_seconds):
+        # Available values: '1m', '5m', '15m', '30m', '1h', '3h', '6h', '12h', '1D', '7D', '14D', '1M'
+        m = 60
+        h = 60 * m
+        d = 24 * h
+        periods = [
+            (1 * m, '1m'),
+            (5 * m, '5m'),
+            (15 * m, '15m'),
+            (30 * m, '30m'),
+            (1 * h, '1h'),
+            (3 * h, '3h'),
+            (6 * h, '6h'),
+            (12 * h, '12h'),
+            (1 * d, '1D'),
+            (7 * d, '7D'),
+            (14 * d, '14D'),
+            (None, '1M'),
+        ]
+        for sec, code in periods:
+            if not sec or sec >= period_seconds:
+                return code
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        period = self._convert_period(period_seconds / 100)
+        start_ms = (since if since else time.time() - period_seconds) * 1000
+        url = 'https://api.bitfinex.com/v2/candles/trade:{}:t{}/hist?start={}&limit={}'.format(period, market, start_ms,
+                                                                                               resolution)
+        # candle: [MTS, OPEN, CLOSE, HIGH, LOW, VOLUME]
+        data = np.array(self._get_json(url, market=market), dtype=float).reshape(-1, 6)
+        data = data[data[:, 0].argsort()]
+        return Series.from_columns(data[:, 0] / 1000, open=data[:, 1], close=data[:, 2], high=data[:, 3],
+                                   low=data[:, 4], volume=data[:, 5])
@@ -0,0 +1,48 @@
+from btcwidget.exchanges.base import ExchangeProvider
+from btcwidget.series import Series
+
+
+class BitMarketExchangeProvider(ExchangeProvider):
+    ID = 'bitmarket.pl'
+
+    def ticker(self, market):
+        data = self._get_json('https://www.bitmarket.pl/json/{}/ticker.json'.format(market), market=market)
+        return data['last']
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        # use smallest graph file covering whole period - also for incremental fetches so candle size does not
+        # depend on since
+        period = self._convert_period(period_seconds)
+        times, opens, closes = self._get_json_columns(
+            'https://www.bitmarket.pl/graphs/{}/{}.json'.format(market, period), ['time', 'open', 'close'],
+            market=market)
+        if not len(times):
+            # new or illiquid market, or nothing new since last fetch
+            return Series()
+        if since:
+            mask = times >= since
+        else:
+            mask = times > times.max() - period_seconds
+        return Series.from_columns(times[mask], open=opens[mask], close=closes[mask])
+
+    def _convert_period(self, period_seconds):
+        m = 60
+        h = 60 * m
+        d = 24 * h
+        if period_seconds <= 90 * m:
+            period = '90m'
+        elif period_seconds <= 6 * h:
+            period = '6h'
+        elif period_seconds <= 1 * d:
+            period = '1d'
+        elif period_seconds <= 7 * d:
+            period = '7d'
+        elif period_seconds <= 30 * d:
+            period = '1m'
+        elif period_seconds <= 90 * d:
+            period = '3m'
+        elif period_seconds <= 180 * d:
+            period = '6m'
+        else:
+            period = '1y'
+        return period
@@ -0,0 +1,44 @@
+import json
+import time
+
+from btcwidget.exchanges.base import ExchangeProvider, websockets
+from btcwidget.resample import ohlcv
+
+
+class BitstampExchangeProvider(ExchangeProvider):
+    ID = 'bitstamp.net'
+    WS_URL = 'wss://ws.bitstamp.net'
+
+    def ticker(self, market):
+        data = self._get_json('https://www.bitstamp.net/api/v2/ticker/{}/'.format(market.lower()), market=market)
+        return float(data['last'])
+
+    async def ticker_stream(self, market):
+        channel = 'live_trades_{}'.format(market.lower())
+        async with websockets.connect(self.WS_URL) as ws:
+            await ws.send(json.dumps({'event': 'bts:subscribe', 'data': {'channel': channel}}))
+            async for message in ws:
+                data = json.loads(message)
+                if data.get('event') == 'bts:request_reconnect':
+                    raise RuntimeError('reconnect requested')
+                if data.get('event') == 'trade' and data.get('channel') == channel:
+                    yield float(data['data']['price'])
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        since_time = since if since else time.time() - period_seconds
+        # use narrowest transactions window covering requested time
+        window_seconds = time.time() - since_time
+        if window_seconds <= 60:
+            time_param = 'minute'
+        elif window_seconds <= 3600:
+            time_param = 'hour'
+        else:
+            time_param = 'day'
+        print('bitstamp.net: getting transactions for {}'.format(time_param))
+        # there should be some dedicated API...
+        times, prices, amounts = self._get_json_columns(
+            'https://www.bitstamp.net/api/v2/transactions/{}/?time={}'.format(market.lower(), time_param),
+            ['date', 'price', 'amount'], market=market)
+        mask = times >= since_time
+        step = max(int(period_seconds / resolution), 1)
+        return ohlcv(times[mask], prices[mask], amounts[mask], step).to_series()
@@ -0,0 +1,30 @@
+from btcwidget.exchanges.base import ExchangeProvider
+from btcwidget.resample import ohlcv
+
+
+class LakeBTCExchangeProvider(ExchangeProvider):
+    ID = 'lakebtc.com'
+
+    def ticker(self, market):
+        return self.tickers([market])[market]
+
+    def tickers(self, markets):
+        # there is only all-pairs ticker
+        data = self._get_json('https://api.LakeBTC.com/api_v2/ticker')
+        return {market: float(data[market.lower()]['last']) for market in markets if market.lower() in data}
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        params = {'symbol': market.lower()}
+        if since:
+            # trades since given timestamp
+            params['at'] = int(since)
+        times, prices, amounts = self._get_json_columns('https://api.lakebtc.com/api_v2/bctrades',
+                                                        ['date', 'price', 'amount'], params, market)
+        if since:
+            mask = times >= since
+        elif len(times):
+            mask = times > times.max() - period_seconds
+        else:
+            mask = times > 0
+        step = max(int(period_seconds / resolution), 1)
+        return ohlcv(times[mask], prices[mask], amounts[mask], step).to_series()
@@ -0,0 +1,48 @@
+import math
+import random
+import time
+
+from btcwidget.exchanges.base import ExchangeProvider
+from btcwidget.series import Series
+
+
+class MockProvider(ExchangeProvider):
+    """Provider used for testing"""
+
+    ID = 'mock'
+    REQUESTS_PER_MIN = 600
+
+    AVG_PRICE = 4000
+    NOISE = 20
+    WAVE1_A = 300
+    WAVE1_F = 0.0003
+    WAVE2_A = 100
+    WAVE2_F = 0.0011
+
+    def __init__(self):
+        self.start_time = time.time()
+
+    def _calc_price(self, timestamp):
+        delta_time = timestamp - self.start_time
+        x = random.gauss(self.AVG_PRICE, self.NOISE)
+        w = 2 * math.pi * self.WAVE1_F
+        x += self.WAVE1_A * math.sin(w * delta_time)
+        w = 2 * math.pi * self.WAVE2_F
+        x += self.WAVE2_A * math.sin(w * delta_time)
+        return x
+
+    def ticker(self, market):
+        return self._calc_price(time.time())
+
+    def graph(self, market, period_seconds, resolution, since=None):
+        stop = int(time.time())
+        step = max(int(period_seconds / resolution), 1)
+        start = int(stop - period_seconds) if not since else int(math.ceil(since / step)) * step
+        data = []
+        for i in range(start, stop, step):
+            entry = {
+                'time': i,
+                'close': self._calc_price(i)
+            }
+            data.append(entry)
+        return Series.from_records(data)
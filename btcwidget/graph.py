@@ -1,3 +1,4 @@
+from gi.repository import GLib
 from matplotlib.figure import Figure
 import matplotlib.cm as cm
 import matplotlib.ticker as ticker
@@ -5,6 +6,11 @@ import matplotlib.ticker as ticker
 # from matplotlib.backends.backend_gtk3agg import FigureCanvasGTK3Agg as FigureCanvas
 from matplotlib.backends.backend_gtk3cairo import FigureCanvasGTK3Cairo as FigureCanvas
 
+from btcwidget.metrics import registry
+
+_render_seconds = registry.histogram('btcwidget_render_seconds', 'Graph update time: "flush" applies queued data and '
+                                     'redraws or blits, "paint" renders figure to window', ['stage'])
+
 
 class MultipleLocatorWithMargin(ticker.MultipleLocator):
 
@@ -21,6 +27,13 @@ class MultipleLocatorWithMargin(ticker.MultipleLocator):
         return dmin, dmax
 
 class Graph(FigureCanvas):
+    """Chart widget. Series updates are coalesced into at most one redraw per frame. On canvases supporting
+    blitting static background (axes, grid, ticks) is cached and only lines and price labels are redrawn."""
+
+    _FRAME_MS = 40
+    # used until widget gets its size
+    _MIN_PLOT_WIDTH = 200
+
     def __init__(self, dark):
         self.figure = Figure(figsize=(0, 1000), dpi=75, facecolor='w', edgecolor='k')
         self.axes = self.figure.add_axes([0.12, 0.08, 0.75, 0.90])
@@ -35,51 +48,118 @@ class Graph(FigureCanvas):
         self.set_size_request(400, 300)
         self.lines = {}
         self.texts = {}
+        self._pending = {}
+        self._flush_source = None
+        self._full_redraw = True
+        self._limits = None
+        self._background = None
+        self._blit = getattr(self, 'supports_blit', False)
+        if self._blit:
+            self.mpl_connect('draw_event', self._on_draw_event)
+        self.connect('map', lambda widget: self._schedule_flush())
+
+    def get_plot_width(self):
+        """Returns width of plot area in pixels"""
+        return max(int(self.axes.bbox.width), self._MIN_PLOT_WIDTH)
 
     def set_data(self, market_id, x, y, color):
         if len(y) == 0:
             return
+        self._pending[market_id] = x, y, color
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_source is None:
+            self._flush_source = GLib.timeout_add(self._FRAME_MS, self._flush)
+
+    def _flush(self):
+        self._flush_source = None
+        if not self.get_mapped():
+            # window is hidden (application sits in tray) - keep updates until it is shown
+            return False
+        with _render_seconds.time(stage='flush'):
+            self._flush_pending()
+        return False
+
+    def _flush_pending(self):
+        pending, self._pending = self._pending, {}
+        for market_id, (x, y, color) in pending.items():
+            self._apply_data(market_id, x, y, color)
+
+        self.axes.relim()
+        self.axes.autoscale_view(False)
+        limits = self.axes.get_xbound() + self.axes.get_ybound()
+        if limits != self._limits:
+            self._full_redraw = True
+            self._limits = limits
+        self._update_text_positions()
+
+        if self._full_redraw or not self._blit or self._background is None:
+            self._full_redraw = False
+            self.draw()
+        else:
+            self.restore_region(self._background)
+            self._draw_dynamic_artists()
+            self.blit(self.figure.bbox)
+
+    def on_draw_event(self, widget, ctx):
+        with _render_seconds.time(stage='paint'):
+            return FigureCanvas.on_draw_event(self, widget, ctx)
+
+    def _apply_data(self, market_id, x, y, color):
         if not market_id in self.lines:
-            line, = self.axes.plot(x, y, color=color)
+            line, = self.axes.plot(x, y, color=color, animated=self._blit)
             self.lines[market_id] = line
+            self._full_redraw = True
         else:
             line = self.lines[market_id]
             line.set_color(color)
             line.set_data(x, y)
 
-        self.axes.relim()
-
         price_text = '{:.2f}'.format(y[-1])
-        xmin, xmax = self.axes.get_xbound()
-        xsize = xmax - xmin
-        text_x, text_y = xmax+xsize*0.01, y[-1]
-
         if not market_id in self.texts:
-            text = self.axes.text(text_x, text_y, price_text, color='w', size='x-small')
+            text = self.axes.text(0, y[-1], price_text, color='w', size='x-small', animated=self._blit)
             text.set_bbox(dict(facecolor=color, edgecolor='none', alpha=0.5))
             text.set_ha('left')
             self.texts[market_id] = text
         else:
             text = self.texts[market_id]
-            text.set_y(text_y)
+            text.set_y(y[-1])
             text.set_text(price_text)
             text.get_bbox_patch().set_facecolor(color)
 
+    def _update_text_positions(self):
+        xmin, xmax = self.axes.get_xbound()
+        xsize = xmax - xmin
+        text_x = xmax + xsize * 0.01
         for i in self.texts:
             self.texts[i].set_x(text_x)
 
-        self.axes.autoscale_view(False)
-        self.draw()
+    def _draw_dynamic_artists(self):
+        for line in self.lines.values():
+            self.axes.draw_artist(line)
+        for text in self.texts.values():
+            self.axes.draw_artist(text)
+
+    def _on_draw_event(self, event):
+        # animated artists are skipped by full draw - cache background and paint them on top
+        self._background = self.copy_from_bbox(self.figure.bbox)
+        self._draw_dynamic_artists()
+        self.blit(self.figure.bbox)
 
     def set_dark(self, dark):
         if dark:
             self.axes.patch.set_facecolor('black')
         else:
             self.axes.patch.set_facecolor('white')
+        self._full_redraw = True
+        self._schedule_flush()
 
     def remove_markets(self, id_list):
         for market_id in id_list:
+            self._pending.pop(market_id, None)
             if market_id in self.lines:
-                self.axes.lines.remove(self.lines[market_id])
-                self.axes.texts.remove(self.texts[market_id])
-        self.draw()
+                self.lines.pop(market_id).remove()
+                self.texts.pop(market_id).remove()
+        self._full_redraw = True
+        self._schedule_flush()
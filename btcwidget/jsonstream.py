@@ -0,0 +1,93 @@
+import array
+import codecs
+import json
+import re
+
+import numpy as np
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+# characters which may follow partially received number
+_NUMBER_CHARS = '0123456789.eE+-'
+
+# parser states: before '[', after '[', after element, after ','
+_START, _FIRST, _AFTER_VALUE, _VALUE = range(4)
+
+
+def iter_array(chunks):
+    """Yields elements of top-level JSON array decoded incrementally from iterable of byte chunks (UTF-8).
+    Only elements of one chunk are kept in memory at once besides not yet decoded input. Runs of complete objects
+    are decoded with single json.loads() call, so decoding is not slower than decoding whole document."""
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    # end of text whose bulk decoding failed - elements before it are decoded one by one so failing text is not
+    # decoded again for every element
+    bulk_fail_end = 0
+    state = _START
+    for chunk in chunks:
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        bulk_fail_end = max(bulk_fail_end - pos, 0)
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state == _START:
+                if char != '[':
+                    raise ValueError('JSON array expected')
+                state = _FIRST
+                pos += 1
+            elif char == ']' and state in (_FIRST, _AFTER_VALUE):
+                return
+            elif state == _AFTER_VALUE:
+                if char != ',':
+                    raise ValueError('Expected "," or "]" in JSON array, got {!r}'.format(char))
+                state = _VALUE
+                pos += 1
+            elif char in ',]':
+                raise ValueError('Expected JSON array element, got {!r}'.format(char))
+            else:
+                values, end = _decode_objects(buffer, pos) if pos >= bulk_fail_end else (None, None)
+                if values is None:
+                    if end is not None:
+                        bulk_fail_end = end
+                    try:
+                        value, end = _decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        # element is not complete yet
+                        break
+                    if char not in '{["' and (end == len(buffer) or buffer[end] in _NUMBER_CHARS):
+                        # number or literal may continue in next chunk
+                        break
+                    values = [value]
+                yield from values
+                pos = end
+                state = _AFTER_VALUE
+    raise ValueError('Unexpected end of JSON array')
+
+
+def _decode_objects(buffer, pos):
+    """Decodes all complete elements from pos up to last '}' in buffer at once. Returns (list of elements, end
+    position), (None, end of text which failed to decode) or (None, None) if there is no such run. Text ending with
+    '}' can only be valid JSON if it ends at element boundary - '}' inside string or nested object leaves the text
+    unterminated."""
+    if buffer[pos] != '{':
+        return None, None
+    last = buffer.rfind('}', pos)
+    if last < 0:
+        return None, None
+    try:
+        return json.loads('[' + buffer[pos:last + 1] + ']'), last + 1
+    except json.JSONDecodeError:
+        return None, last + 1
+
+
+def read_columns(chunks, keys):
+    """Decodes top-level JSON array of objects and returns list of float64 arrays with values of given keys"""
+    columns = [array.array('d') for _ in keys]
+    for record in iter_array(chunks):
+        for column, key in zip(columns, keys):
+            column.append(float(record[key]))
+    return [np.frombuffer(column, dtype=float) for column in columns]
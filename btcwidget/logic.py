@@ -1,142 +1,473 @@
+import asyncio
+import concurrent.futures
 import threading
 import time
 import sys
-from gi.repository import GObject
 
+import btcwidget.alarms
+import btcwidget.candlecache
 import btcwidget.currency
 import btcwidget.exchanges
-import btcwidget.alarmmessage
 from btcwidget.config import config, get_market_id
+from btcwidget.metrics import registry
+from btcwidget.rollup import CandlePyramid
+from btcwidget.scheduler import PollScheduler
+from btcwidget.spread import SpreadEngine, is_derived
+
+_fetch_seconds = registry.histogram('btcwidget_fetch_seconds', 'Duration of successful ticker/graph fetches',
+                                    ['exchange', 'market', 'kind'])
+_fetch_errors = registry.counter('btcwidget_fetch_errors_total', 'Failed ticker/graph fetches',
+                                 ['exchange', 'market', 'kind'])
+_aggregation_seconds = registry.histogram('btcwidget_aggregation_seconds', 'Time spent merging, appending and '
+                                          'trimming graph series', ['exchange', 'market'])
+_queue_depth = registry.gauge('btcwidget_fetch_queue_depth', 'Fetches started and not finished yet', ['exchange'])
 
 
 class UpdateThread(threading.Thread):
-    def __init__(self, main_win):
+    """Runs single asyncio event loop fetching data for all configured markets.
+    Blocking provider calls are executed in fixed size thread pool so thread count does not depend on number
+    of markets. When each market is polled is decided by btcwidget.scheduler.PollScheduler.
+    Results are passed to sink (see btcwidget.sinks.Sink) from this thread."""
+
+    # how often the loop checks which polls are due
+    _TICK_SEC = 1
+    _INTERVAL_CONFIG_KEYS = {
+        'ticker': 'update_interval_sec',
+        # all polled markets of exchange supporting batch ticker
+        'tickers': 'update_interval_sec',
+        'graph': 'graph_interval_sec',
+    }
+
+    # triggered alarms are disabled in configuration file
+    _SAVE_TRIGGERED_ALARMS = True
+
+    def __init__(self, sink, recorder=None):
+        """recorder - optional btcwidget.replay.LogWriter receiving ticks and graph data"""
         threading.Thread.__init__(self, daemon=True)
-        self._main_win = main_win
-        self._last_graph_update = 0
+        self._sink = sink
+        self._recorder = recorder
+        self._loop = None
+        self._scheduler = PollScheduler()
         self._graph_data_dict = {}
+        self._last_candle_time = {}
+        self._graph_steps = {}
+        # market_id -> CandlePyramid with all graph data seen, used to switch graph period without requests
+        self._pyramids = {}
+        # spread market_id -> SpreadEngine
+        self._spreads = {}
         self._last_ticer = {}
-        self._ticker_threads = {}
-        self._graph_threads = {}
+        self._in_flight = {}
+        self._exchange_semaphores = {}
+        self._ticker_streams = {}
+        self._streaming_market_ids = set()
+        self._stream_retry_time = {}
+        # latest streamed price of each market not handled yet
+        self._stream_prices = {}
         config.register_change_callback(self._on_config_change)
 
     def run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=config['fetch_workers'],
+                                                         thread_name_prefix='fetch')
+        self._loop.set_default_executor(executor)
+        self._rebuild_spreads()
+        self._loop.run_until_complete(self._main())
+
+    async def _main(self):
         while True:
+            self._handle_stream_prices()
             self._update_tickers()
             self._update_graph()
-            time.sleep(config['update_interval_sec'])
+            if self._recorder:
+                self._recorder.flush_if_due()
+            await asyncio.sleep(self._TICK_SEC)
+
+    def data_time(self):
+        """Returns current time of data (differs from wall clock in replay)"""
+        return time.time()
+
+    def _start_fetch(self, kind, exchange, target, coro_func, *args):
+        """Starts coro_func(target, *args) if previous fetch of the same kind and target finished and scheduler
+        says it is due. Target is market_id or exchange for batch fetches."""
+        key = (kind, target)
+        if key in self._in_flight:
+            # previous request has not finished yet
+            return
+        if not self._scheduler.due(key, exchange, self._get_interval(kind)):
+            return
+        task = self._loop.create_task(coro_func(target, *args))
+        self._in_flight[key] = task
+        _queue_depth.inc(exchange=exchange)
+        task.add_done_callback(lambda t: self._on_fetch_done(key, exchange))
+
+    def _on_fetch_done(self, key, exchange):
+        self._in_flight.pop(key, None)
+        _queue_depth.inc(-1, exchange=exchange)
+
+    def _get_interval(self, kind):
+        return config[self._INTERVAL_CONFIG_KEYS[kind]]
+
+    def _get_exchange_semaphore(self, exchange):
+        if exchange not in self._exchange_semaphores:
+            self._exchange_semaphores[exchange] = asyncio.Semaphore(config['fetch_concurrency_per_exchange'])
+        return self._exchange_semaphores[exchange]
 
     def _update_tickers(self):
-        for i, market_config in enumerate(config['markets']):
-            if i not in self._ticker_threads:
-                market_id = get_market_id(market_config)
-                thread = threading.Thread(target=self._fetch_market_ticker, args=(market_id,), daemon=True)
-                self._ticker_threads[market_id] = thread
-                thread.start()
+        batches = {}
+        for market_config in config['markets']:
+            exchange = market_config['exchange']
+            if is_derived(exchange):
+                # computed from prices of other markets
+                continue
+            market_id = get_market_id(market_config)
+            self._update_ticker_stream(market_id, market_config)
+            if market_id in self._streaming_market_ids:
+                continue
+            # fallback to polling while stream is not connected
+            if btcwidget.exchanges.factory.get(exchange).supports_batch_ticker():
+                batches.setdefault(exchange, []).append(market_config['market'])
+            else:
+                self._start_fetch('ticker', exchange, market_id, self._fetch_market_ticker)
+        for exchange, markets in batches.items():
+            self._start_fetch('tickers', exchange, exchange, self._fetch_exchange_tickers, markets)
+
+    def _update_ticker_stream(self, market_id, market_config):
+        if not config['streaming_ticker'] or market_id in self._ticker_streams:
+            return
+        provider = btcwidget.exchanges.factory.get(market_config['exchange'])
+        if provider.supports_ticker_stream() and time.time() >= self._stream_retry_time.get(market_id, 0):
+            task = self._loop.create_task(self._run_ticker_stream(market_id))
+            self._ticker_streams[market_id] = task
+            task.add_done_callback(lambda t: self._ticker_streams.pop(market_id, None))
+
+    async def _run_ticker_stream(self, market_id):
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed before stream started
+            return
+        market_config, _ = market_entry
+        exchange, market = market_config['exchange'], market_config['market']
+        provider = btcwidget.exchanges.factory.get(exchange)
+        try:
+            async for price in provider.ticker_stream(market):
+                if market_id not in self._streaming_market_ids:
+                    print('{} {}: ticker stream connected'.format(provider.get_name(), market))
+                    self._streaming_market_ids.add(market_id)
+                # active stream pushes every trade - only latest price per loop tick is handled
+                self._stream_prices[market_id] = price
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print('Ticker stream for {} disconnected: {}'.format(market_id, e), file=sys.stderr)
+        finally:
+            self._streaming_market_ids.discard(market_id)
+            self._stream_retry_time[market_id] = time.time() + config['stream_retry_sec']
+
+    def _handle_stream_prices(self):
+        prices, self._stream_prices = self._stream_prices, {}
+        for market_id, price in prices.items():
+            self._handle_ticker(market_id, price)
 
     def _update_graph(self):
-        now = time.time()
-        update_graph = now - self._last_graph_update >= config['graph_interval_sec']
-        if update_graph:
-            print('Updating graph data')
-        self._last_graph_update = now
-        for i, market_config in enumerate(config['markets']):
-            if market_config['graph']:
-                if update_graph:
-                    market_id = get_market_id(market_config)
-                    thread = threading.Thread(target=self._fetch_market_graph_data, args=(market_id,), daemon=True)
-                    self._graph_threads[market_id] = thread
-                    thread.start()
-
-    def _fetch_market_ticker(self, market_id):
-
-        market_config, _ = config.get_market_by_id(market_id)
+        for market_config in config['markets']:
+            if market_config['graph'] and not is_derived(market_config['exchange']):
+                market_id = get_market_id(market_config)
+                self._start_fetch('graph', market_config['exchange'], market_id, self._fetch_market_graph_data)
+
+    async def _fetch_market_ticker(self, market_id):
+
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed before fetch started
+            return
+        market_config, _ = market_entry
         exchange, market = market_config['exchange'], market_config['market']
         provider = btcwidget.exchanges.factory.get(exchange)
         try:
-            price = provider.ticker(market)
+            async with self._get_exchange_semaphore(exchange):
+                start = time.perf_counter()
+                price = await provider.async_ticker(market)
+                _fetch_seconds.observe(time.perf_counter() - start, exchange=exchange, market=market, kind='ticker')
         except Exception as e:
             print('Failed to update ticker data for {}: {}'.format(market_id, e), file=sys.stderr)
+            _fetch_errors.inc(exchange=exchange, market=market, kind='ticker')
+            self._scheduler.on_error(('ticker', market_id), exchange, e)
             price = None
 
         if price:
-            price_str = btcwidget.currency.service.format_price(price, market[3:])
-            print('{} {} ticker: {}'.format(provider.get_name(), market, price_str))
-            GObject.idle_add(self._main_win.set_current_price, market_id, price_str)
+            self._scheduler.on_success(('ticker', market_id), exchange, self._get_interval('ticker'),
+                                       {market_id: price})
+            self._handle_ticker(market_id, price)
 
-            self._check_alarms(exchange, market, price)
+    async def _fetch_exchange_tickers(self, exchange, markets):
+        provider = btcwidget.exchanges.factory.get(exchange)
+        market_label = ','.join(markets)
+        try:
+            async with self._get_exchange_semaphore(exchange):
+                start = time.perf_counter()
+                prices = await provider.async_tickers(markets)
+                # one label for all markets of batch, not one per combination of markets
+                _fetch_seconds.observe(time.perf_counter() - start, exchange=exchange, market='*', kind='ticker')
+        except Exception as e:
+            print('Failed to update ticker data for {} {}: {}'.format(exchange, market_label, e), file=sys.stderr)
+            _fetch_errors.inc(exchange=exchange, market='*', kind='ticker')
+            self._scheduler.on_error(('tickers', exchange), exchange, e)
+            return
+
+        prices = {get_market_id({'exchange': exchange, 'market': market}): price
+                  for market, price in prices.items() if price}
+        self._scheduler.on_success(('tickers', exchange), exchange, self._get_interval('tickers'), prices)
+        for market_id, price in prices.items():
+            self._handle_ticker(market_id, price)
+
+    def _handle_ticker(self, market_id, price):
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed while its price was fetched
+            return
+        market_config, _ = market_entry
+        exchange, market = market_config['exchange'], market_config['market']
+        exchange_name = btcwidget.exchanges.factory.info(exchange).name
+        price_str = btcwidget.currency.service.format_price(price, market[3:])
+        print('{} {} ticker: {}'.format(exchange_name, market, price_str))
+        self._sink.set_current_price(market_id, price)
+
+        self._check_alarms(exchange, market, price)
 
-            self._last_ticer[market_id] = {
-                'time': time.time(),
-                'open': price,
-                'close': price,
-            }
-            if market_id in self._graph_data_dict:
-                graph_data = self._graph_data_dict[market_id]
-                graph_data.append(self._last_ticer[market_id])
-                self._update_market_graph(market_id)
+        now = self.data_time()
+        # derived prices are not recorded - they are computed again in replay
+        if self._recorder and not is_derived(exchange):
+            self._recorder.ticker(now, market_id, price)
+        self._last_ticer[market_id] = {
+            'time': now,
+            'open': price,
+            'close': price,
+        }
+        if market_id in self._pyramids:
+            self._pyramids[market_id].add_tick(self._last_ticer[market_id]['time'], price)
+        if market_id in self._graph_data_dict:
+            self._append_ticker(self._graph_data_dict[market_id], self._last_ticer[market_id])
+            self._update_market_graph(market_id)
 
-        self._ticker_threads.pop(market_id, None)
+        for spread_id, engine in self._spreads.items():
+            spread = engine.update(market_id, price)
+            if spread is not None:
+                self._handle_ticker(spread_id, spread)
+                self._sink.set_spread_details(spread_id, engine.details())
 
-    def _fetch_market_graph_data(self, market_id):
+    def _rebuild_spreads(self):
+        market_ids = [get_market_id(mc) for mc in config['markets']]
+        self._spreads = {}
+        for market_config in config['markets']:
+            if is_derived(market_config['exchange']):
+                engine = SpreadEngine(market_config['market'], market_ids)
+                # start from known prices so spread does not wait for next tick of every market
+                for market_id in engine.source_ids:
+                    if market_id in self._last_ticer:
+                        engine.update(market_id, self._last_ticer[market_id]['close'])
+                self._spreads[get_market_id(market_config)] = engine
 
-        market_config, _ = config.get_market_by_id(market_id)
+    def _update_spread_graphs(self, source_id=None, changed_since=None):
+        """Updates graphs of spreads of given source market (or all spreads) from source graphs. If changed_since
+        is given only spreads from that time on are computed again."""
+        step = self._get_graph_step()
+        period_start = self.data_time() - config['graph_period_sec']
+        # price of source whose candles stopped is not carried forward for longer than until next graph poll
+        max_age = step + config['graph_interval_sec']
+        for spread_id, engine in self._spreads.items():
+            market_entry = config.get_market_by_id(spread_id)
+            if not market_entry or not market_entry[0]['graph'] or source_id not in [None] + engine.source_ids:
+                # spread may have been removed from configuration since engines were built
+                continue
+            self._set_graph_step(spread_id, step)
+            series = self._graph_data_dict.get(spread_id)
+            incremental = series is not None and changed_since is not None and changed_since > period_start
+            exchange, market = spread_id.split('/', 1)
+            with _aggregation_seconds.time(exchange=exchange, market=market):
+                graph_data = engine.history(self._graph_data_dict, step,
+                                            changed_since if incremental else period_start, max_age)
+                if incremental:
+                    series.merge(graph_data)
+            if incremental:
+                if spread_id in self._last_ticer:
+                    self._append_ticker(series, self._last_ticer[spread_id])
+                self._update_market_graph(spread_id)
+            elif graph_data:
+                self._set_market_graph_data(spread_id, graph_data)
+
+    def _get_graph_step(self):
+        return max(int(config['graph_period_sec'] / config['graph_res']), 1)
+
+    def _get_pyramid(self, market_id):
+        if market_id not in self._pyramids:
+            self._pyramids[market_id] = CandlePyramid()
+        return self._pyramids[market_id]
+
+    async def _fetch_market_graph_data(self, market_id):
+
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed before fetch started
+            return
+        market_config, _ = market_entry
         exchange, market = market_config['exchange'], market_config['market']
         provider = btcwidget.exchanges.factory.get(exchange)
+        loop = asyncio.get_running_loop()
+        period, resolution = config['graph_period_sec'], config['graph_res']
+        step = self._get_graph_step()
+        pyramid = self._get_pyramid(market_id)
+
+        self._set_graph_step(market_id, step)
+
+        if market_id not in self._graph_data_dict:
+            # show cached candles immediately and only fetch the missing part
+            cached_data = await loop.run_in_executor(None, btcwidget.candlecache.cache.load, exchange, market, step,
+                                                     time.time() - period)
+            if cached_data:
+                print('{} {}: loaded {} cached candles'.format(provider.get_name(), market, len(cached_data)))
+                pyramid.add(cached_data, step)
+                if self._recorder:
+                    # replay has no candle cache
+                    self._recorder.graph(time.time(), market_id, step, cached_data)
+                self._set_market_graph_data(market_id, cached_data)
+                self._last_candle_time[market_id] = cached_data.last_time()
+
+        # last candle may have been incomplete so it is fetched again
+        since_time = self._last_candle_time.get(market_id)
+        print('Updating graph data for {}'.format(market_id))
 
         try:
-            graph_data = provider.graph(market, config['graph_period_sec'], config['graph_res'])
+            async with self._get_exchange_semaphore(exchange):
+                start = time.perf_counter()
+                graph_data = await provider.async_graph(market, period, resolution, since_time)
+                _fetch_seconds.observe(time.perf_counter() - start, exchange=exchange, market=market, kind='graph')
         except Exception as e:
             print('Failed to update graph data for {}: {}'.format(market_id, e), file=sys.stderr)
+            _fetch_errors.inc(exchange=exchange, market=market, kind='graph')
+            self._scheduler.on_error(('graph', market_id), exchange, e)
             graph_data = None
 
+        if graph_data is not None:
+            self._scheduler.on_success(('graph', market_id), exchange, self._get_interval('graph'))
         if graph_data:
+            await loop.run_in_executor(None, btcwidget.candlecache.cache.store, exchange, market, step,
+                                       graph_data.view(), time.time() - period)
+            if self._recorder:
+                self._recorder.graph(time.time(), market_id, step, graph_data)
+            self._handle_graph(market_id, step, graph_data)
+
+    def _set_graph_step(self, market_id, step):
+        if self._graph_steps.get(market_id) != step:
+            # resolution changed - held data cannot be merged with new candles
+            self._graph_data_dict.pop(market_id, None)
+            self._last_candle_time.pop(market_id, None)
+            self._graph_steps[market_id] = step
+
+    def _handle_graph(self, market_id, step, graph_data):
+        """Adds candles of step seconds to graph of market (all of them or only the newest ones)"""
+        exchange, market = market_id.split('/', 1)
+        with _aggregation_seconds.time(exchange=exchange, market=market):
+            self._get_pyramid(market_id).add(graph_data, step)
+        if self._graph_steps.get(market_id) != step:
+            # graph period changed while fetching
+            return
+        self._last_candle_time[market_id] = graph_data.last_time()
+        if market_id in self._graph_data_dict:
+            with _aggregation_seconds.time(exchange=exchange, market=market):
+                self._graph_data_dict[market_id].merge(graph_data)
             if market_id in self._last_ticer:
-                graph_data.append(self._last_ticer[market_id])
-            self._graph_data_dict[market_id] = graph_data
+                self._append_ticker(self._graph_data_dict[market_id], self._last_ticer[market_id])
             self._update_market_graph(market_id)
+        else:
+            self._set_market_graph_data(market_id, graph_data)
+        self._update_spread_graphs(market_id, graph_data.time[0])
+
+    def _serve_graph_locally(self, market_id, step):
+        """Replaces graph data with candles built from rollup pyramid. Returns False if pyramid does not cover
+        configured period."""
+        pyramid = self._pyramids.get(market_id)
+        if not pyramid:
+            return False
+        exchange, market = market_id.split('/', 1)
+        with _aggregation_seconds.time(exchange=exchange, market=market):
+            graph_data = pyramid.get(config['graph_period_sec'], step, self.data_time())
+        if not graph_data:
+            return False
+        print('{}: graph served from local rollups ({} candles)'.format(market_id, len(graph_data)))
+        self._graph_steps[market_id] = step
+        self._last_candle_time[market_id] = graph_data.last_time()
+        self._set_market_graph_data(market_id, graph_data)
+        return True
 
-        self._graph_threads.pop(market_id, None)
+    def _set_market_graph_data(self, market_id, graph_data):
+        if market_id in self._last_ticer:
+            self._append_ticker(graph_data, self._last_ticer[market_id])
+        self._graph_data_dict[market_id] = graph_data
+        self._update_market_graph(market_id)
+
+    def _append_ticker(self, series, ticker):
+        last_time = series.last_time()
+        if last_time is None or ticker['time'] > last_time:
+            price = ticker['close']
+            series.append(ticker['time'], price, price, price, price)
 
     def _update_market_graph(self, market_id):
-        now = time.time()
-        graph_data = self._graph_data_dict[market_id]
-        graph_data = [t for t in graph_data if t['time'] > now - config['graph_period_sec']]
-        GObject.idle_add(self._main_win.set_graph_data, market_id, graph_data)
+        now = self.data_time()
+        series = self._graph_data_dict[market_id]
+        exchange, market = market_id.split('/', 1)
+        with _aggregation_seconds.time(exchange=exchange, market=market):
+            series.trim(now - config['graph_period_sec'])
+            view = series.view()
+        self._sink.set_graph_data(market_id, view)
 
     def _on_config_change(self):
-        self._last_graph_update = 0
+        # called from UI thread - state is owned by event loop thread
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._apply_config_change)
+
+    def _apply_config_change(self):
+        # batches may include newly added markets
+        self._scheduler.reset('tickers')
 
         market_ids = set([get_market_id(mc) for mc in config['markets']])
         removed_market_ids = self._last_ticer.keys() - market_ids
         [self._last_ticer.pop(market_id, None) for market_id in removed_market_ids]
+        [self._scheduler.remove(('ticker', market_id)) for market_id in removed_market_ids]
+
+        for market_id in list(self._ticker_streams):
+            if not config['streaming_ticker'] or market_id not in market_ids:
+                self._ticker_streams[market_id].cancel()
 
         market_ids = set([get_market_id(mc) for mc in config['markets'] if mc['graph']])
         removed_graph_market_ids = self._graph_data_dict.keys() - market_ids
         [self._graph_data_dict.pop(market_id, None) for market_id in removed_graph_market_ids]
+        [self._last_candle_time.pop(market_id, None) for market_id in removed_graph_market_ids]
+        [self._scheduler.remove(('graph', market_id)) for market_id in removed_graph_market_ids]
+        [self._pyramids.pop(market_id, None) for market_id in removed_graph_market_ids]
 
-        self._main_win.remove_graph_markets(removed_graph_market_ids)
+        # graph period or resolution may have changed - serve it from rollups if possible, otherwise fetch it now
+        step = self._get_graph_step()
+        for market_id in market_ids:
+            if is_derived(market_id.split('/', 1)[0]):
+                continue
+            if self._graph_steps.get(market_id) == step or not self._serve_graph_locally(market_id, step):
+                self._scheduler.reset('graph', market_id)
+        self._rebuild_spreads()
+        self._update_spread_graphs()
+
+        self._sink.remove_graph_markets(removed_graph_market_ids)
 
         for market_id in self._last_ticer:
-            last_price = self._last_ticer[market_id]['close']
-            market_config, _ = config.get_market_by_id(market_id)
-            price_str = btcwidget.currency.service.format_price(last_price, market_config['market'][3:])
-            GObject.idle_add(self._main_win.set_current_price, market_id, price_str)
+            self._sink.set_current_price(market_id, self._last_ticer[market_id]['close'])
         for market_id in self._graph_data_dict:
             self._update_market_graph(market_id)
 
     def _check_alarms(self, exchange, market, price):
-        for alarm in config['alarms']:
-            if alarm['exchange'] == exchange and alarm['market'] == market:
-                if alarm['type'] == 'A' and price >= alarm['price']:
-                    self._trigger_alarm(alarm, price)
-                if alarm['type'] == 'B' and price <= alarm['price']:
-                    self._trigger_alarm(alarm, price)
-
-    def _trigger_alarm(self, alarm, price):
-        if alarm['type'] == 'A':
-            GObject.idle_add(btcwidget.alarmmessage.alarm_above_message, alarm, price)
-        else:
-            GObject.idle_add(btcwidget.alarmmessage.alarm_below_message, alarm, price)
-        config['alarms'].remove(alarm)
-        config.save()
+        triggered = btcwidget.alarms.index.pop_triggered(exchange, market, price)
+        if not triggered:
+            return
+        for alarm in triggered:
+            self._sink.alarm_triggered(alarm, price)
+        if self._SAVE_TRIGGERED_ALARMS:
+            config.save()
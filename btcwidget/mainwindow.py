@@ -1,13 +1,16 @@
 import os
 import time
-from gi.repository import Gtk
+from gi.repository import GObject, Gtk
 
+import btcwidget.alarmmessage
 import btcwidget.currency
+import btcwidget.downsample
 import btcwidget.exchanges
-import btcwidget.graph
+import btcwidget.sinks
 from btcwidget.config import config, get_market_id
 from btcwidget.indicator import Indicator
 from btcwidget.optionsdialog import open_options_dialog
+from btcwidget.startup import profiler
 from definitions import ROOT_DIR
 
 
@@ -26,18 +29,35 @@ class MainWindow(Gtk.Window):
         self._tickers_vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self._create_ticker_labels()
 
-        self._graph = btcwidget.graph.Graph(config['dark_theme'])
+        # graph (and matplotlib) is loaded when window is shown for the first time
+        self._graph = None
+        self._graph_data = {}
+        # market_id -> (series version, plot width, indices of plotted points)
+        self._downsample_cache = {}
 
-        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        vbox.pack_start(self._tickers_vbox, False, False, 5)
-        vbox.pack_start(self._graph, True, True, 0)
+        self._vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        self._vbox.pack_start(self._tickers_vbox, False, False, 5)
 
         self.set_icon_from_file(self._ICON_PATH)
         self.connect('delete-event', Gtk.main_quit)
-        self.add(vbox)
-        self.show_all()
-
-        self._indicator = Indicator(self)
+        self.connect('map', self._on_map)
+        self.add(self._vbox)
+        self._vbox.show_all()
+
+        with profiler.phase('indicator'):
+            self._indicator = Indicator(self)
+
+    def _on_map(self, widget):
+        if self._graph:
+            return
+        with profiler.phase('graph'):
+            import btcwidget.graph
+            self._graph = btcwidget.graph.Graph(config['dark_theme'])
+            self._vbox.pack_start(self._graph, True, True, 0)
+            self._graph.show()
+        graph_data, self._graph_data = self._graph_data, {}
+        for market_id, data in graph_data.items():
+            self.set_graph_data(market_id, data)
 
     # self.open_options()
 
@@ -50,8 +70,8 @@ class MainWindow(Gtk.Window):
                 market_id = get_market_id(market_config)
                 hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
                 exchange, market = market_config['exchange'], market_config['market']
-                provider = btcwidget.exchanges.factory.get(exchange)
-                market_name = '{} - {}:'.format(provider.get_name(), market)
+                exchange_name = btcwidget.exchanges.factory.info(exchange).name
+                market_name = '{} - {}:'.format(exchange_name, market)
                 name_label = Gtk.Label(market_name)
                 color = self._get_color(i)
                 name_label.set_markup('<span color="{}">{}</span>'.format(color, market_name))
@@ -66,8 +86,13 @@ class MainWindow(Gtk.Window):
 
         self._tickers_vbox.show_all()
 
-    def set_current_price(self, market_id, price_str):
-        market_config, i = config.get_market_by_id(market_id)
+    def set_current_price(self, market_id, price):
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed after its price was queued
+            return
+        market_config, i = market_entry
+        price_str = btcwidget.currency.service.format_price(price, market_config['market'][3:])
         price_html = '<span color="{}">{}</span>'.format(self._get_color(i), price_str)
         if market_id in self._ticker_labels:
             self._ticker_labels[market_id].set_markup(price_html)
@@ -75,28 +100,96 @@ class MainWindow(Gtk.Window):
             self.set_title(price_str)
             self._indicator.set_current_price(price_str)
 
+    def set_spread_details(self, market_id, details):
+        if market_id not in self._ticker_labels:
+            return
+        currency = market_id[-3:]
+        lines = ['Buy at {}, sell at {}'.format(self._get_market_name(details['buy']),
+                                                 self._get_market_name(details['sell']))]
+        for buy_id, sell_id, gain in details['pairs']:
+            lines.append('{} -> {}: {}'.format(self._get_market_name(buy_id), self._get_market_name(sell_id),
+                                                btcwidget.currency.service.format_price(gain, currency)))
+        self._ticker_labels[market_id].set_tooltip_text('\n'.join(lines))
+
+    def _get_market_name(self, market_id):
+        exchange, market = market_id.split('/', 1)
+        return '{} {}'.format(btcwidget.exchanges.factory.info(exchange).name, market)
+
     def open_options(self):
         if open_options_dialog(self):
             self._on_config_change()
 
     def _on_config_change(self):
-        self._graph.set_dark(config['dark_theme'])
+        if self._graph:
+            self._graph.set_dark(config['dark_theme'])
         self._create_ticker_labels()
         config.run_change_callbacks()
 
     def remove_graph_markets(self, graph_markets):
+        [self._downsample_cache.pop(market_id, None) for market_id in graph_markets]
+        if not self._graph:
+            [self._graph_data.pop(market_id, None) for market_id in graph_markets]
+            return
         self._graph.remove_markets(graph_markets)
 
     def set_graph_data(self, market_id, graph_data):
+        if not self._graph:
+            # keep only latest data until graph is created
+            self._graph_data[market_id] = graph_data
+            return
         now = time.time()
-        market_config, i = config.get_market_by_id(market_id)
+        market_entry = config.get_market_by_id(market_id)
+        if not market_entry:
+            # market was removed after its data was queued
+            return
+        market_config, i = market_entry
         market = market_config['market']
         market_currency = market[3:]
         graph_currency = config['graph_currency']
         graph_price_mult = btcwidget.currency.service.convert(1, market_currency, graph_currency)
-        x = [int((e['time'] - now) / config['time_axis_div']) for e in graph_data]
-        y = [float(e['close']) * graph_price_mult for e in graph_data]
+        if graph_price_mult is None:
+            # exchange rates are not loaded yet
+            return
+        indices = self._get_plotted_indices(market_id, graph_data)
+        x = (graph_data.time[indices] - now) / config['time_axis_div']
+        y = graph_data.close[indices] * graph_price_mult
         self._graph.set_data(market_id, x, y, self._get_color(i))
 
+    def _get_plotted_indices(self, market_id, graph_data):
+        # points selection does not depend on time shift and currency (positive) scaling so it is reused until
+        # series changes
+        width = self._graph.get_plot_width()
+        cached = self._downsample_cache.get(market_id)
+        if cached and cached[:2] == (graph_data.version, width):
+            return cached[2]
+        indices = btcwidget.downsample.m4_indices(graph_data.time, graph_data.close, width)
+        self._downsample_cache[market_id] = graph_data.version, width, indices
+        return indices
+
     def _get_color(self, i):
         return self._COLORS[i % len(self._COLORS)]
+
+
+class GtkSink(btcwidget.sinks.Sink):
+    """Passes data from update thread to main window in GTK main loop"""
+
+    def __init__(self, main_win):
+        self._main_win = main_win
+
+    def set_current_price(self, market_id, price):
+        GObject.idle_add(self._main_win.set_current_price, market_id, price)
+
+    def set_graph_data(self, market_id, graph_data):
+        GObject.idle_add(self._main_win.set_graph_data, market_id, graph_data)
+
+    def remove_graph_markets(self, market_ids):
+        GObject.idle_add(self._main_win.remove_graph_markets, market_ids)
+
+    def set_spread_details(self, market_id, details):
+        GObject.idle_add(self._main_win.set_spread_details, market_id, details)
+
+    def alarm_triggered(self, alarm, price):
+        if alarm['type'] == 'A':
+            GObject.idle_add(btcwidget.alarmmessage.alarm_above_message, alarm, price)
+        else:
+            GObject.idle_add(btcwidget.alarmmessage.alarm_below_message, alarm, price)
@@ -0,0 +1,227 @@
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from btcwidget.config import config
+
+
+class _Metric:
+    """Metric family with fixed label names. Values are kept per label values tuple."""
+
+    TYPE = None
+
+    def __init__(self, registry, name, help, label_names):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = registry.lock
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def samples(self):
+        """Returns list of (labels dict, value) pairs"""
+        with self._lock:
+            return [(dict(zip(self.label_names, key)), self._copy(value)) for key, value in self._values.items()]
+
+    def _copy(self, value):
+        return value
+
+    def _format_labels(self, labels, extra=()):
+        items = list(labels.items()) + list(extra)
+        if not items:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                              for k, v in items) + '}'
+
+    def exposition(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} {}'.format(self.name, self.TYPE)]
+        for labels, value in sorted(self.samples(), key=lambda s: sorted(s[0].items())):
+            lines += self._format_sample(labels, value)
+        return lines
+
+    def _format_sample(self, labels, value):
+        return ['{}{} {}'.format(self.name, self._format_labels(labels), _format_value(value))]
+
+
+class Counter(_Metric):
+    TYPE = 'counter'
+
+    def inc(self, value=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(_Metric):
+    TYPE = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, value=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts plus sum and count, same layout as Prometheus histograms"""
+
+    TYPE = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, registry, name, help, label_names, buckets=None):
+        _Metric.__init__(self, registry, name, help, label_names)
+        self.buckets = tuple(buckets or self.DEFAULT_BUCKETS) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data['buckets'][i] += 1
+            data['sum'] += value
+            data['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _copy(self, value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    def quantile(self, data, q):
+        """Estimates quantile from sample data as upper bound of bucket containing it"""
+        rank = q * data['count']
+        for bound, count in zip(self.buckets, data['buckets']):
+            if count >= rank:
+                return bound
+        return math.inf
+
+    def _format_sample(self, labels, value):
+        lines = []
+        for bound, count in zip(self.buckets, value['buckets']):
+            le = '+Inf' if bound == math.inf else _format_value(bound)
+            lines.append('{}_bucket{} {}'.format(self.name, self._format_labels(labels, [('le', le)]), count))
+        lines.append('{}_sum{} {}'.format(self.name, self._format_labels(labels), _format_value(value['sum'])))
+        lines.append('{}_count{} {}'.format(self.name, self._format_labels(labels), value['count']))
+        return lines
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _MetricsRegistry:
+    """Process-wide collection of metrics. Metrics are safe to update from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics = {}
+        self._server = None
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, label_names=()):
+        return self._add(Counter(self, name, help, label_names))
+
+    def gauge(self, name, help, label_names=()):
+        return self._add(Gauge(self, name, help, label_names))
+
+    def histogram(self, name, help, label_names=(), buckets=None):
+        return self._add(Histogram(self, name, help, label_names, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def exposition(self):
+        """Returns all metrics in Prometheus text format"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines += self._metrics[name].exposition()
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self):
+        """Serves exposition on http://127.0.0.1:<metrics_port>/metrics if metrics_port is configured"""
+        port = config['metrics_port']
+        if port is None or self._server:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        except OSError as e:
+            print('Failed to start metrics server on port {}: {}'.format(port, e), file=sys.stderr)
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        print('Serving metrics on http://127.0.0.1:{}/metrics'.format(port))
+
+    def summary(self):
+        """Returns human readable per exchange/market summary of fetch latency and errors"""
+        lines = []
+        fetch_seconds = self.get('btcwidget_fetch_seconds')
+        fetch_errors = self.get('btcwidget_fetch_errors_total')
+        fetches = {tuple(sorted(labels.items())): data for labels, data in fetch_seconds.samples()} \
+            if fetch_seconds else {}
+        errors = {tuple(sorted(labels.items())): value for labels, value in fetch_errors.samples()} \
+            if fetch_errors else {}
+        for key in sorted(fetches.keys() | errors.keys()):
+            labels = dict(key)
+            line = '{}/{} {}: '.format(labels['exchange'], labels['market'], labels['kind'])
+            data = fetches.get(key)
+            if data:
+                line += '{} ok, avg {:.0f} ms, p90 < {} ms, '.format(
+                    data['count'], data['sum'] / data['count'] * 1000, _format_ms(fetch_seconds.quantile(data, 0.9)))
+            lines.append(line + '{} errors'.format(errors.get(key, 0)))
+        http_errors = self.get('btcwidget_http_errors_total')
+        if http_errors:
+            for labels, value in sorted(http_errors.samples(), key=lambda s: sorted(s[0].items())):
+                lines.append('{} HTTP {} errors: {}'.format(labels['host'], labels['error'], value))
+        render_seconds = self.get('btcwidget_render_seconds')
+        if render_seconds:
+            for labels, data in sorted(render_seconds.samples(), key=lambda s: sorted(s[0].items())):
+                lines.append('graph {}: {} frames, avg {:.1f} ms'.format(
+                    labels['stage'], data['count'], data['sum'] / data['count'] * 1000))
+        queue_depth = self.get('btcwidget_fetch_queue_depth')
+        if queue_depth and queue_depth.samples():
+            lines.append('in-flight fetches: {}'.format(sum(value for _, value in queue_depth.samples())))
+        return '\n'.join(lines) if lines else 'No data collected yet'
+
+
+def _format_ms(sec):
+    return 'inf' if sec == math.inf else '{:.0f}'.format(sec * 1000)
+
+
+registry = _MetricsRegistry()
@@ -4,6 +4,7 @@ from gi.repository import Gtk
 
 import btcwidget.currency
 import btcwidget.exchanges
+import btcwidget.metrics
 from btcwidget.config import config
 
 
@@ -33,7 +34,7 @@ class OptionsDialog(Gtk.Dialog):
 
         self.graph_currency_combo = Gtk.ComboBoxText()
         self.graph_currency_combo.set_entry_text_column(0)
-        currencies = sorted(btcwidget.currency.service.list())
+        currencies = sorted(set(btcwidget.currency.service.list()) | {config['graph_currency']})
         for i, currency in enumerate(currencies):
             self.graph_currency_combo.append_text(currency)
             if currency == config['graph_currency']:
@@ -51,9 +52,10 @@ class OptionsDialog(Gtk.Dialog):
             market_config_dict[(market_config['exchange'], market_config['market'])] = market_config
 
         for id in exchange_ids:
-            provider = btcwidget.exchanges.factory.get(id)
-            treeiter = self.store.append(None, [provider.get_name(), None, None, None, id, None])
-            for market in provider.get_markets():
+            # metadata only - providers are not loaded until market is enabled
+            info = btcwidget.exchanges.factory.info(id)
+            treeiter = self.store.append(None, [info.name, None, None, None, id, None])
+            for market in info.markets:
                 market_config = market_config_dict.get((id, market), {})
                 ticker = market_config.get('ticker', False)
                 graph = market_config.get('graph', False)
@@ -83,6 +85,11 @@ class OptionsDialog(Gtk.Dialog):
         tree.expand_all()
         box.add(tree)
 
+        stats_label = Gtk.Label(btcwidget.metrics.registry.summary(), xalign=0, selectable=True)
+        stats_expander = Gtk.Expander(label="Statistics")
+        stats_expander.add(stats_label)
+        box.add(stats_expander)
+
         self.show_all()
 
     def _on_toggle_ticker(self, renderer, path):
@@ -115,7 +122,8 @@ class OptionsDialog(Gtk.Dialog):
             config['graph_currency'] = self.graph_currency_combo.get_active_text()
             config['dark_theme'] = self.dark_theme_check.get_active()
 
-            config['markets'] = []
+            # list is built before it is assigned so other threads never see it partially filled
+            markets = []
             treeiter = self.store.get_iter_first()
             while treeiter:
                 childiter = self.store.iter_children(treeiter)
@@ -130,9 +138,10 @@ class OptionsDialog(Gtk.Dialog):
                             'indicator': row[self._INDICATOR_COL],
                         }
                         if market_config['ticker'] or market_config['graph'] or market_config['indicator']:
-                            config['markets'].append(market_config)
+                            markets.append(market_config)
                     childiter = self.store.iter_next(childiter)
                 treeiter = self.store.iter_next(treeiter)
+            config['markets'] = markets
 
         except ValueError as e:
             print(e, file=sys.stderr)  # ignore errors
@@ -0,0 +1,156 @@
+"""Recording of update thread input and its replay.
+
+Log is append-only binary file: magic header followed by zlib compressed blocks, each prefixed by its compressed
+size (4 bytes, little endian). Block contains JSON lines, one per record:
+
+    ["ticker", time, market_id, price]
+    ["graph", time, market_id, step, [time...], [open...], [high...], [low...], [close...], [volume...]]
+
+Ticker records are prices passed to alarms, graph and sinks (from polling, batch or streaming ticker), graph records
+are candles returned by providers. Records are buffered and written as a block every few seconds, so log of a crashed
+process loses at most last block. Replay feeds records through the same UpdateThread code at recorded pace scaled by
+speed factor (or as fast as possible), without network requests.
+"""
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from btcwidget.config import config
+from btcwidget.logic import UpdateThread
+from btcwidget.series import Series
+
+_MAGIC = b'BTCWLOG1'
+_BLOCK_HEADER = struct.Struct('<I')
+
+
+class LogWriter:
+    """Appends records to log file. Methods are called from update thread."""
+
+    # block is written when buffered records reach this size or age
+    _BLOCK_SIZE = 256 * 1024
+    _BLOCK_SEC = 5
+
+    def __init__(self, path):
+        new_file = not os.path.isfile(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, 'rb') as file:
+                if file.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError('{} is not a btcwidget log'.format(path))
+        self._file = open(path, 'ab')
+        if new_file:
+            self._file.write(_MAGIC)
+        self._buffer = []
+        self._buffer_size = 0
+        self._block_time = time.time()
+
+    def ticker(self, record_time, market_id, price):
+        self._add(['ticker', record_time, market_id, price])
+
+    def graph(self, record_time, market_id, step, series):
+        self._add(['graph', record_time, market_id, step] + [getattr(series, c).tolist() for c in Series.COLUMNS])
+
+    def _add(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        self._buffer.append(line)
+        self._buffer_size += len(line)
+        if self._buffer_size >= self._BLOCK_SIZE:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Writes buffered records if the oldest block age was reached. Called periodically by update thread so
+        records are written also when no new records come."""
+        if time.time() - self._block_time >= self._BLOCK_SEC:
+            self.flush()
+
+    def flush(self):
+        self._block_time = time.time()
+        if not self._buffer:
+            return
+        block = zlib.compress(''.join(self._buffer).encode('utf-8'))
+        self._buffer = []
+        self._buffer_size = 0
+        self._file.write(_BLOCK_HEADER.pack(len(block)) + block)
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_log(path):
+    """Yields records of log file in recorded order. Graph records have Series in place of columns.
+    Incomplete last block (e.g. after crash) is skipped."""
+    with open(path, 'rb') as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('{} is not a btcwidget log'.format(path))
+        while True:
+            header = file.read(_BLOCK_HEADER.size)
+            if not header:
+                return
+            block = file.read(_BLOCK_HEADER.unpack(header)[0]) if len(header) == _BLOCK_HEADER.size else b''
+            try:
+                lines = zlib.decompress(block).decode('utf-8').splitlines()
+            except zlib.error:
+                print('{}: skipping incomplete block at the end'.format(path), file=sys.stderr)
+                return
+            for line in lines:
+                record = json.loads(line)
+                if record[0] == 'graph':
+                    record = record[:4] + [Series.from_columns(*record[4:])]
+                yield record
+
+
+class ReplayThread(UpdateThread):
+    """UpdateThread fed from log instead of exchanges. Clock of the engine follows recorded times, so graph periods
+    and tick times look as they did during recording. Records of markets missing in configuration are skipped.
+    run() returns when log is exhausted."""
+
+    # backtested alarms must not be disarmed in user's configuration
+    _SAVE_TRIGGERED_ALARMS = False
+    # give control back to event loop (config changes) after this many records replayed without waiting
+    _YIELD_EVERY = 1000
+
+    def __init__(self, sink, path, speed=1.0):
+        """speed - replay speed factor, 0 replays as fast as possible"""
+        UpdateThread.__init__(self, sink)
+        self._path = path
+        self._speed = speed
+        self._replay_time = None
+        self.replayed_count = 0
+
+    def data_time(self):
+        return self._replay_time if self._replay_time is not None else time.time()
+
+    async def _main(self):
+        skipped = set()
+        start_time = time.monotonic()
+        first_time = None
+        for record in read_log(self._path):
+            kind, record_time, market_id = record[:3]
+            if first_time is None:
+                first_time = record_time
+            delay = (record_time - first_time) / self._speed - (time.monotonic() - start_time) if self._speed else 0
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif self.replayed_count % self._YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+            market_entry = config.get_market_by_id(market_id)
+            if not market_entry:
+                skipped.add(market_id)
+                continue
+            self._replay_time = record_time
+            if kind == 'ticker':
+                self._handle_ticker(market_id, record[3])
+            elif kind == 'graph' and market_entry[0]['graph']:
+                self._set_graph_step(market_id, record[3])
+                self._handle_graph(market_id, record[3], record[4])
+            self.replayed_count += 1
+        if skipped:
+            print('Skipped records of markets not in configuration: {}'.format(', '.join(sorted(skipped))),
+                  file=sys.stderr)
@@ -0,0 +1,63 @@
+from collections import namedtuple
+
+import numpy as np
+
+from btcwidget.series import Series
+
+
+class Candles(namedtuple('Candles', ['time', 'open', 'high', 'low', 'close', 'volume', 'vwap'])):
+    """Column arrays of aggregated candles"""
+
+    def to_series(self):
+        return Series.from_columns(self.time, self.open, self.high, self.low, self.close, self.volume)
+
+
+def ohlcv(times, prices, amounts, step):
+    """Aggregates trades into candles of step seconds. Candle time is start of its bucket.
+    Buckets without trades are filled with close price of previous candle and zero volume."""
+    times = np.asarray(times, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    amounts = np.asarray(amounts, dtype=float)
+    if len(times) == 0:
+        empty = np.empty(0)
+        return Candles(*([empty] * len(Candles._fields)))
+    if np.any(np.diff(times) < 0):
+        order = np.argsort(times, kind='stable')
+        times, prices, amounts = times[order], prices[order], amounts[order]
+
+    bucket_index = (times // step).astype(np.int64)
+    bucket_index -= bucket_index[0]
+    count = int(bucket_index[-1]) + 1
+
+    # first trade of each non-empty bucket
+    starts = np.flatnonzero(np.r_[True, bucket_index[1:] != bucket_index[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    filled = bucket_index[starts]
+
+    open_ = np.full(count, np.nan)
+    high = np.full(count, np.nan)
+    low = np.full(count, np.nan)
+    close = np.full(count, np.nan)
+    volume = np.zeros(count)
+    vwap = np.full(count, np.nan)
+
+    open_[filled] = prices[starts]
+    close[filled] = prices[ends]
+    high[filled] = np.maximum.reduceat(prices, starts)
+    low[filled] = np.minimum.reduceat(prices, starts)
+    bucket_volume = np.add.reduceat(amounts, starts)
+    bucket_value = np.add.reduceat(prices * amounts, starts)
+    volume[filled] = bucket_volume
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap[filled] = np.where(bucket_volume > 0, bucket_value / bucket_volume, prices[ends])
+
+    # forward fill empty buckets with previous close
+    empty = np.isnan(close)
+    if np.any(empty):
+        last_filled = np.maximum.accumulate(np.where(empty, 0, np.arange(count)))
+        prev_close = close[last_filled]
+        for column in (open_, high, low, close, vwap):
+            column[empty] = prev_close[empty]
+
+    time = (times[0] // step + np.arange(count)) * step
+    return Candles(time, open_, high, low, close, volume, vwap)
@@ -0,0 +1,143 @@
+import numpy as np
+
+from btcwidget.series import Series
+
+
+def aggregate(series, step):
+    """Rolls candles (or ticks) up into candles of step seconds. Candle time is start of its bucket.
+    Buckets without data are skipped."""
+    return Series.from_columns(**_aggregate_columns(series, step))
+
+
+def _aggregate_columns(series, step):
+    times = series.time
+    if not len(times):
+        return {'time': times}
+    buckets = times // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    return {
+        'time': buckets[starts] * step,
+        'open': series.open[starts],
+        'high': np.fmax.reduceat(series.high, starts),
+        'low': np.fmin.reduceat(series.low, starts),
+        'close': series.close[ends],
+        'volume': np.add.reduceat(series.volume, starts),
+    }
+
+
+class CandlePyramid:
+    """Candles of one market kept in several resolutions (10s, 1m, 5m, 1h, 1d), each with its own retention.
+    New data is rolled into the finest level whose buckets contain whole candles (so every level holds candles at its
+    full resolution) and every coarser level is recomputed incrementally from the level below, only for buckets
+    touched by new data. Stored rows are never exposed while adding, so levels are updated in place. Time ranges
+    covered by added data are tracked, so graph for any period covered without gaps can be then built locally
+    without network requests."""
+
+    # (candle seconds, retention seconds)
+    LEVELS = (
+        (10, 6 * 3600),
+        (60, 24 * 3600),
+        (5 * 60, 7 * 24 * 3600),
+        (3600, 90 * 24 * 3600),
+        (24 * 3600, 2 * 365 * 24 * 3600),
+    )
+    # data closer to each other is treated as continuous - ticks are polled at most few minutes apart
+    _MAX_GAP_SEC = 5 * 60
+
+    def __init__(self):
+        self._levels = [Series() for _ in self.LEVELS]
+        # sorted non-overlapping [start, end] time ranges covered by added data
+        self._ranges = []
+        # requested candle step -> actual candle step derived from candle spacing
+        self._candle_steps = {}
+
+    def add(self, series, step=0):
+        """Adds candles of step seconds (0 for ticks) sorted by time. Stored candles starting at or after first
+        added candle's bucket are replaced. Candles not fitting into buckets of any level (coarser than the
+        coarsest level, step not dividing level step or candles not aligned to step) are ignored."""
+        if not len(series):
+            return
+        times = series.time
+        if step:
+            step = self._get_candle_step(times, step)
+        first_level = self._get_first_level(times, step)
+        if first_level is None:
+            return
+        first_time = times[0]
+        self._add_range(first_time, times[-1] + step)
+        self._merge(first_level, _aggregate_columns(series, self.LEVELS[first_level][0]), first_time)
+        for i in range(first_level + 1, len(self.LEVELS)):
+            level_step = self.LEVELS[i][0]
+            # rows of level below from start of first touched bucket
+            source = self._levels[i - 1].tail(first_time // level_step * level_step)
+            if len(source):
+                self._merge(i, _aggregate_columns(source, level_step), source.time[0])
+        for level, (_, retention) in zip(self._levels[first_level:], self.LEVELS[first_level:]):
+            level.trim(level.last_time() - retention)
+
+    def add_tick(self, time, price):
+        self.add(Series.from_columns([time], close=[price]))
+
+    def _get_candle_step(self, times, step):
+        """Providers may return candles longer than requested step (e.g. exchange's own candle sizes), so length of
+        candles is derived from spacing of all candles added with the same requested step"""
+        if len(times) > 1 and np.all(times == np.round(times)):
+            spacing = int(np.gcd.reduce(np.diff(times).astype(np.int64)))
+            known = self._candle_steps.get(step)
+            self._candle_steps[step] = int(np.gcd(known, spacing)) if known else spacing
+        return max(step, self._candle_steps.get(step, step))
+
+    def _get_first_level(self, times, step):
+        if step and np.any(times % step):
+            # candles would cross bucket boundaries
+            return None
+        return next((i for i, (level_step, _) in enumerate(self.LEVELS)
+                     if level_step >= step and (not step or level_step % step == 0)), None)
+
+    def _add_range(self, start, end):
+        ranges = self._ranges
+        if ranges and ranges[-1][0] <= start <= ranges[-1][1] + self._MAX_GAP_SEC:
+            # usual case - new data continues the newest range
+            ranges[-1][1] = max(ranges[-1][1], end)
+            return
+        merged = []
+        for range_start, range_end in sorted(ranges + [[start, end]]):
+            if merged and range_start <= merged[-1][1] + self._MAX_GAP_SEC:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        # ranges older than retention of the coarsest level are not needed
+        self._ranges = [r for r in merged if r[1] >= merged[-1][1] - self.LEVELS[-1][1]]
+
+    def _covers(self, start, end):
+        return any(range_start <= start and range_end >= end for range_start, range_end in self._ranges)
+
+    def _merge(self, index, columns, source_start):
+        level = self._levels[index]
+        first_bucket = columns['time'][0]
+        if source_start > first_bucket:
+            # new data covers first bucket only partially - combine it with stored candle. Stored candle may have
+            # been built from the same rows before, so combining must be idempotent: volume is not summed.
+            stored = level.tail(first_bucket)
+            if len(stored) and stored.time[0] == first_bucket:
+                columns['open'][0] = stored.open[0]
+                columns['high'][0] = np.fmax(columns['high'][0], stored.high[0])
+                columns['low'][0] = np.fmin(columns['low'][0], stored.low[0])
+                columns['volume'][0] = np.fmax(columns['volume'][0], stored.volume[0])
+        level.merge(Series.from_columns(**columns))
+
+    def get(self, period_seconds, step, now):
+        """Returns Series with candles of step seconds covering period ending at now, built from coarsest level
+        with enough data, or None if no level covers the period or added data has gaps in it."""
+        since = now - period_seconds
+        for level, (level_step, _) in reversed(list(zip(self._levels, self.LEVELS))):
+            if level_step > step or not len(level) or level.first_time() > since + level_step:
+                continue
+            if not self._covers(since + level_step, now - self._MAX_GAP_SEC):
+                return None
+            view = level.view()
+            # keep bucket containing since
+            view.trim(since - level_step)
+            return aggregate(view, step)
+        return None
@@ -0,0 +1,152 @@
+import email.utils
+import random
+import time
+
+import btcwidget.exchanges
+from btcwidget.config import config
+from btcwidget.metrics import registry
+
+_poll_interval = registry.gauge('btcwidget_poll_interval_seconds', 'Current adaptive polling interval',
+                                ['exchange', 'market', 'kind'])
+_backoffs = registry.counter('btcwidget_backoffs_total', 'Exchange backoffs after failed requests',
+                             ['exchange', 'reason'])
+
+
+class PollScheduler:
+    """Decides when each (kind, target) key is polled, target being market_id or exchange for batch fetches.
+    Intervals start at configured value and adapt to price movement, every exchange has its own request budget
+    (token bucket) and is backed off exponentially after errors, honoring Retry-After of rate limited responses.
+    All intervals are jittered so requests do not come in bursts. Not thread-safe - used from update thread event
+    loop only."""
+
+    # adaptive interval stays within this range of configured interval
+    _MIN_FACTOR = 0.25
+    _MAX_FACTOR = 4.0
+    # relative price change between polls which speeds polling up, or below which it slows down
+    _FAST_MOVE = 0.002
+    _FLAT_MOVE = 0.0002
+    # every interval is randomly scaled by 1 +/- this value
+    _JITTER = 0.1
+    _BACKOFF_BASE_SEC = 5
+    _BACKOFF_MAX_SEC = 10 * 60
+    # protects against bogus Retry-After values stopping polling for good
+    _RETRY_AFTER_MAX_SEC = 60 * 60
+    # token bucket holds budget for this many seconds so short bursts (e.g. after config change) are allowed
+    _BURST_SEC = 10
+
+    def __init__(self):
+        self._next_time = {}
+        self._factors = {}
+        self._last_prices = {}
+        self._failures = {}
+        self._backoff_until = {}
+        self._tokens = {}
+
+    def due(self, key, exchange, interval):
+        """Returns True if key should be polled now. Budget is consumed and next poll is scheduled in such case."""
+        now = time.time()
+        if now < self._next_time.get(key, 0) or now < self._backoff_until.get(exchange, 0):
+            return False
+        if not self._take_token(exchange, now):
+            return False
+        self._next_time[key] = now + self._get_interval(key, exchange, interval)
+        return True
+
+    def on_success(self, key, exchange, interval, prices=None):
+        """Reports successful poll. If prices (dict market_id -> price) are given polling interval adapts to their
+        changes - the fastest moving market decides."""
+        self._failures.pop(exchange, None)
+        if prices:
+            self._adapt(key, prices)
+        self._next_time[key] = time.time() + self._get_interval(key, exchange, interval)
+
+    def on_error(self, key, exchange, error):
+        """Reports failed poll. Whole exchange is backed off because errors are usually caused by rate limits or
+        server problems rather than by particular market."""
+        failures = self._failures.get(exchange, 0) + 1
+        self._failures[exchange] = failures
+        # jittered so markets of one exchange do not retry at the same moment
+        delay = random.uniform(0.5, 1.0) * min(self._BACKOFF_BASE_SEC * 2 ** (failures - 1), self._BACKOFF_MAX_SEC)
+        retry_after = _get_retry_after(error)
+        reason = 'error'
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self._RETRY_AFTER_MAX_SEC))
+            reason = 'retry_after'
+        self._backoff_until[exchange] = max(self._backoff_until.get(exchange, 0), time.time() + delay)
+        _backoffs.inc(exchange=exchange, reason=reason)
+        print('{}: backing off for {:.0f} s after {} failure(s)'.format(exchange, delay, failures))
+
+    def reset(self, kind, target=None):
+        """Makes all keys of given kind (or only given target) due immediately (exchange backoff still applies)"""
+        for key in self._next_time:
+            if key[0] == kind and target in (None, key[1]):
+                self._next_time[key] = 0
+
+    def remove(self, key):
+        self._next_time.pop(key, None)
+        self._factors.pop(key, None)
+        target = key[1]
+        if not any(k[1] == target for k in self._next_time):
+            # last key of removed market (prices of batch markets are dropped with their 'ticker' key)
+            self._last_prices.pop(target, None)
+
+    def _adapt(self, key, prices):
+        changes = []
+        for market_id, price in prices.items():
+            last_price = self._last_prices.get(market_id)
+            self._last_prices[market_id] = price
+            if last_price:
+                changes.append(abs(price - last_price) / last_price)
+        if not changes:
+            return
+        change = max(changes)
+        factor = self._factors.get(key, 1.0)
+        if change >= self._FAST_MOVE:
+            factor = max(factor / 2, self._MIN_FACTOR)
+        elif change <= self._FLAT_MOVE:
+            factor = min(factor * 1.25, self._MAX_FACTOR)
+        self._factors[key] = factor
+
+    def _get_interval(self, key, exchange, interval):
+        interval *= self._factors.get(key, 1.0)
+        kind, target = key
+        market = target.split('/', 1)[1] if '/' in target else '*'
+        _poll_interval.set(interval, exchange=exchange, market=market, kind=kind)
+        return interval * random.uniform(1 - self._JITTER, 1 + self._JITTER)
+
+    def _take_token(self, exchange, now):
+        rate = self._get_budget(exchange) / 60
+        capacity = max(rate * self._BURST_SEC, 1)
+        tokens, last_time = self._tokens.get(exchange, (capacity, now))
+        tokens = min(tokens + (now - last_time) * rate, capacity)
+        if tokens < 1:
+            self._tokens[exchange] = tokens, now
+            return False
+        self._tokens[exchange] = tokens - 1, now
+        return True
+
+    def _get_budget(self, exchange):
+        """Returns allowed requests per minute"""
+        budget = config['exchange_requests_per_min'].get(exchange)
+        if budget is None:
+            budget = btcwidget.exchanges.factory.get(exchange).REQUESTS_PER_MIN
+        return budget
+
+
+def _get_retry_after(error):
+    """Returns delay in seconds requested by rate limited (429) or unavailable (503) response, None if not given"""
+    resp = getattr(error, 'response', None)
+    if resp is None or resp.status_code not in (429, 503):
+        return None
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        # HTTP date
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
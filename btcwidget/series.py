@@ -0,0 +1,183 @@
+import itertools
+
+import numpy as np
+
+# shared by all series so (version) identifies content of any series, not only within one object
+_versions = itertools.count()
+
+
+class Series:
+    """Columnar OHLCV time series backed by preallocated float64 arrays.
+
+    Rows are kept sorted by time. Appending is amortized O(1) and trimming old rows only moves start offset.
+    Views returned by view() share memory with the series. Rows visible through a view are never modified in place -
+    the buffer is copied before they would be overwritten - so views can be safely handed to other threads.
+    Version attribute changes on every modification and can be used as cache key for derived data."""
+
+    COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+    _TIME, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME = range(len(COLUMNS))
+
+    def __init__(self, capacity=256):
+        self._data = np.empty((len(self.COLUMNS), max(capacity, 1)))
+        self._start = 0
+        self._end = 0
+        # rows below this index may be referenced by views
+        self._exposed_end = 0
+        self.version = next(_versions)
+
+    @classmethod
+    def from_columns(cls, time, open=None, high=None, low=None, close=None, volume=None):
+        """Creates series from column arrays. Missing prices are derived from the other ones.
+        Rows are sorted by time if needed."""
+        time = np.asarray(time, dtype=float)
+        columns = [open, high, low, close, volume]
+        if np.any(np.diff(time) < 0):
+            order = np.argsort(time, kind='stable')
+            time = time[order]
+            columns = [np.asarray(c, dtype=float)[order] if c is not None else None for c in columns]
+        series = cls(len(time))
+        series.extend(time, *columns)
+        return series
+
+    @classmethod
+    def from_records(cls, records):
+        """Creates series from list of dicts with keys 'time', 'close' and optional 'open', 'high', 'low', 'volume'"""
+        columns = {}
+        for name in cls.COLUMNS:
+            if records and name in records[0]:
+                columns[name] = np.fromiter((r[name] for r in records), dtype=float, count=len(records))
+        if 'time' not in columns:
+            columns['time'] = np.empty(0)
+        return cls.from_columns(**columns)
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _column(self, index):
+        self._exposed_end = max(self._exposed_end, self._end)
+        return self._data[index, self._start:self._end]
+
+    @property
+    def time(self):
+        return self._column(self._TIME)
+
+    @property
+    def open(self):
+        return self._column(self._OPEN)
+
+    @property
+    def high(self):
+        return self._column(self._HIGH)
+
+    @property
+    def low(self):
+        return self._column(self._LOW)
+
+    @property
+    def close(self):
+        return self._column(self._CLOSE)
+
+    @property
+    def volume(self):
+        return self._column(self._VOLUME)
+
+    def first_time(self):
+        return self._data[self._TIME, self._start] if len(self) else None
+
+    def last_time(self):
+        return self._data[self._TIME, self._end - 1] if len(self) else None
+
+    def last_close(self):
+        return self._data[self._CLOSE, self._end - 1] if len(self) else None
+
+    def tail(self, min_time):
+        """Returns new series with copies of rows with time greater or equal to min_time. Unlike view() it does not
+        expose rows of this series, so they can still be replaced in place."""
+        times = self._data[self._TIME, self._start:self._end]
+        start = self._start + int(np.searchsorted(times, min_time, side='left'))
+        return Series.from_columns(*self._data[:, start:self._end])
+
+    def view(self):
+        """Returns read-only snapshot sharing memory with this series"""
+        view = Series.__new__(Series)
+        view._data = self._data
+        view._start = self._start
+        view._end = self._end
+        view._exposed_end = self._end
+        view.version = self.version
+        self._exposed_end = max(self._exposed_end, self._end)
+        return view
+
+    def _reserve(self, count):
+        """Makes room for count rows at the end of series"""
+        size = len(self)
+        capacity = self._data.shape[1]
+        if self._end + count <= capacity and self._end >= self._exposed_end:
+            return
+        # reallocate instead of moving rows in place - old buffer may be used by views
+        new_capacity = max(capacity, 1)
+        while new_capacity < (size + count) * 2:
+            new_capacity *= 2
+        data = np.empty((len(self.COLUMNS), new_capacity))
+        data[:, :size] = self._data[:, self._start:self._end]
+        self._data = data
+        self._start = 0
+        self._end = size
+        self._exposed_end = 0
+
+    def append(self, time, open, high, low, close, volume=0.0):
+        self._reserve(1)
+        self._data[:, self._end] = (time, open, high, low, close, volume)
+        self._end += 1
+        self.version = next(_versions)
+
+    def extend(self, time, open=None, high=None, low=None, close=None, volume=None):
+        """Appends rows given as column arrays"""
+        time = np.asarray(time, dtype=float)
+        count = len(time)
+        if count == 0:
+            return
+        if close is None:
+            close = open
+        if open is None:
+            open = close
+        open, close = np.asarray(open, dtype=float), np.asarray(close, dtype=float)
+        if high is None:
+            high = np.maximum(open, close)
+        if low is None:
+            low = np.minimum(open, close)
+        if volume is None:
+            volume = 0.0
+        self._reserve(count)
+        rows = slice(self._end, self._end + count)
+        self._data[self._TIME, rows] = time
+        self._data[self._OPEN, rows] = open
+        self._data[self._HIGH, rows] = high
+        self._data[self._LOW, rows] = low
+        self._data[self._CLOSE, rows] = close
+        self._data[self._VOLUME, rows] = volume
+        self._end += count
+        self.version = next(_versions)
+
+    def merge(self, other):
+        """Replaces rows starting at first time of other series with rows of other series"""
+        if not len(other):
+            return
+        self.truncate(other.time[0])
+        self.extend(other.time, other.open, other.high, other.low, other.close, other.volume)
+
+    def truncate(self, min_time):
+        """Removes rows with time greater or equal to min_time"""
+        times = self._data[self._TIME, self._start:self._end]
+        end = self._start + int(np.searchsorted(times, min_time, side='left'))
+        if end != self._end:
+            self._end = end
+            self.version = next(_versions)
+
+    def trim(self, min_time):
+        """Removes rows with time lower or equal to min_time"""
+        times = self._data[self._TIME, self._start:self._end]
+        removed = int(np.searchsorted(times, min_time, side='right'))
+        if removed:
+            self._start += removed
+            self.version = next(_versions)
@@ -0,0 +1,107 @@
+import json
+import sys
+import threading
+import time
+
+
+class Sink:
+    """Receiver of data produced by UpdateThread. Methods are called from update thread."""
+
+    def set_current_price(self, market_id, price):
+        pass
+
+    def set_graph_data(self, market_id, graph_data):
+        """graph_data is read-only btcwidget.series.Series view"""
+        pass
+
+    def remove_graph_markets(self, market_ids):
+        pass
+
+    def alarm_triggered(self, alarm, price):
+        pass
+
+    def set_spread_details(self, market_id, details):
+        """details of spread market - see btcwidget.spread.SpreadEngine.details()"""
+        pass
+
+
+class MultiSink(Sink):
+    """Passes data to all given sinks"""
+
+    def __init__(self, sinks):
+        self._sinks = list(sinks)
+
+    def set_current_price(self, market_id, price):
+        for sink in self._sinks:
+            sink.set_current_price(market_id, price)
+
+    def set_graph_data(self, market_id, graph_data):
+        for sink in self._sinks:
+            sink.set_graph_data(market_id, graph_data)
+
+    def remove_graph_markets(self, market_ids):
+        for sink in self._sinks:
+            sink.remove_graph_markets(market_ids)
+
+    def alarm_triggered(self, alarm, price):
+        for sink in self._sinks:
+            sink.alarm_triggered(alarm, price)
+
+    def set_spread_details(self, market_id, details):
+        for sink in self._sinks:
+            sink.set_spread_details(market_id, details)
+
+
+class CallbackSink(Sink):
+    """Converts data to JSON-compatible records and passes them to callback function.
+    Each record is dict with 'type' ('ticker', 'graph', 'remove_graph', 'alarm' or 'spread') and 'time' keys.
+    Time is taken from clock function (e.g. UpdateThread.data_time to get recorded times in replay)."""
+
+    def __init__(self, callback, clock=time.time):
+        self._callback = callback
+        self._clock = clock
+
+    def _emit(self, record_type, **fields):
+        record = {'type': record_type, 'time': self._clock()}
+        record.update(fields)
+        self._callback(record)
+
+    def set_current_price(self, market_id, price):
+        self._emit('ticker', market=market_id, price=price)
+
+    def set_graph_data(self, market_id, graph_data):
+        self._emit('graph', market=market_id, data={c: getattr(graph_data, c).tolist() for c in graph_data.COLUMNS})
+
+    def remove_graph_markets(self, market_ids):
+        self._emit('remove_graph', markets=sorted(market_ids))
+
+    def alarm_triggered(self, alarm, price):
+        self._emit('alarm', alarm=alarm, price=price)
+
+    def set_spread_details(self, market_id, details):
+        self._emit('spread', market=market_id, **details)
+
+
+class JsonLinesSink(CallbackSink):
+    """Writes records as JSON lines to text stream (stdout by default)"""
+
+    def __init__(self, stream=None, clock=time.time):
+        CallbackSink.__init__(self, self._write, clock)
+        self._stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+
+
+class FileSink(JsonLinesSink):
+    """Appends records as JSON lines to file"""
+
+    def __init__(self, path, clock=time.time):
+        JsonLinesSink.__init__(self, open(path, 'a'), clock)
+
+    def close(self):
+        self._stream.close()
@@ -0,0 +1,104 @@
+import numpy as np
+
+import btcwidget.currency
+import btcwidget.exchanges
+from btcwidget.series import Series
+
+# pseudo exchange whose markets are spreads of configured markets
+SPREAD_EXCHANGE = 'spread'
+
+
+def is_derived(exchange):
+    """Returns True if markets of exchange are computed locally instead of fetched"""
+    return 'derived' in btcwidget.exchanges.factory.info(exchange).capabilities
+
+
+class SpreadEngine:
+    """Cross-exchange spread of one asset, e.g. market BTCUSD is spread between all configured BTC markets with
+    prices converted to USD. Quote currency of spread market is used rather than graph_currency, so graph converts
+    spread like price of any other market. Spread is the highest minus the lowest normalized price - the best venue
+    to buy at is the cheapest one and the best venue to sell at is the most expensive one. Latest prices are kept in
+    one vector so every tick updates spread in O(markets) without looking at history. History for graph is built
+    separately from candles of source markets aligned on common time grid."""
+
+    def __init__(self, market, market_ids):
+        """market_ids - configured market ids, markets of other assets and derived markets are ignored"""
+        self.market = market
+        self._currency = market[3:]
+        self.source_ids = [m for m in market_ids if self._is_source(m)]
+        self._index = {market_id: i for i, market_id in enumerate(self.source_ids)}
+        # normalized latest prices, NaN if not known yet
+        self._prices = np.full(len(self.source_ids), np.nan)
+
+    def _is_source(self, market_id):
+        exchange, market = market_id.split('/', 1)
+        return not is_derived(exchange) and market[:3] == self.market[:3]
+
+    def _get_rate(self, market_id):
+        return btcwidget.currency.service.convert(1, market_id[-3:], self._currency)
+
+    def update(self, market_id, price):
+        """Sets latest price of source market. Returns current spread or None if market is not a source or fewer than
+        two venues have known prices."""
+        i = self._index.get(market_id)
+        if i is None:
+            return None
+        rate = self._get_rate(market_id)
+        if rate is None:
+            # exchange rates are not loaded yet
+            return None
+        self._prices[i] = price * rate
+        return self.spread()
+
+    def spread(self):
+        if np.count_nonzero(~np.isnan(self._prices)) < 2:
+            return None
+        return float(np.nanmax(self._prices) - np.nanmin(self._prices))
+
+    def best_venues(self):
+        """Returns (market_id to buy at, market_id to sell at) or None if fewer than two venues have known prices"""
+        if self.spread() is None:
+            return None
+        return self.source_ids[np.nanargmin(self._prices)], self.source_ids[np.nanargmax(self._prices)]
+
+    def pairwise(self):
+        """Returns matrix of spreads of all source pairs: [i, j] is normalized price of source j minus price of
+        source i, i.e. gain from buying at i and selling at j. Unknown prices give NaN."""
+        return self._prices[np.newaxis, :] - self._prices[:, np.newaxis]
+
+    def details(self):
+        """Returns JSON-compatible dict with 'buy' and 'sell' (best venues) and 'pairs' (list of [buy market_id,
+        sell market_id, gain] with positive gain, the most profitable first), or None if spread is not known"""
+        venues = self.best_venues()
+        if not venues:
+            return None
+        matrix = self.pairwise()
+        with np.errstate(invalid='ignore'):
+            buy_indices, sell_indices = np.nonzero(matrix > 0)
+        gains = matrix[buy_indices, sell_indices]
+        order = np.argsort(-gains, kind='stable')
+        pairs = [[self.source_ids[buy_indices[k]], self.source_ids[sell_indices[k]], float(gains[k])] for k in order]
+        return {'buy': venues[0], 'sell': venues[1], 'pairs': pairs}
+
+    def history(self, graphs, step, since, max_age):
+        """Returns Series of spreads on grid of step seconds starting at bucket of since. graphs is dict of source
+        market id -> Series. Every market contributes close of its last candle started before end of grid bucket, so
+        markets with sparse candles keep their last price, but at most for max_age seconds after the candle start.
+        Buckets with fewer than two priced venues are skipped."""
+        series_list = [(i, graphs.get(market_id), self._get_rate(market_id))
+                       for i, market_id in enumerate(self.source_ids)]
+        series_list = [(i, s, rate) for i, s, rate in series_list if s is not None and len(s) and rate is not None]
+        if len(series_list) < 2:
+            return Series()
+        end = max(s.last_time() for _, s, _ in series_list)
+        grid = np.arange(since // step * step, end + 1, step, dtype=float)
+        prices = np.full((len(self.source_ids), len(grid)), np.nan)
+        for i, series, rate in series_list:
+            times = series.time
+            indices = np.searchsorted(times, grid + step) - 1
+            known = indices >= 0
+            known[known] = grid[known] - times[indices[known]] <= max_age
+            prices[i, known] = series.close[indices[known]] * rate
+        valid = np.count_nonzero(~np.isnan(prices), axis=0) >= 2
+        prices = prices[:, valid]
+        return Series.from_columns(grid[valid], close=np.nanmax(prices, axis=0) - np.nanmin(prices, axis=0))
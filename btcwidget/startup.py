@@ -0,0 +1,87 @@
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+class _StartupProfiler:
+    """Collects per-import and per-phase startup timings.
+    Report is printed when BTCWIDGET_STARTUP_REPORT=1 environment variable or --startup-report argument is used."""
+
+    # imports faster than this are not reported
+    _MIN_IMPORT_SEC = 0.001
+
+    def __init__(self):
+        self.enabled = os.environ.get('BTCWIDGET_STARTUP_REPORT') == '1' or '--startup-report' in sys.argv
+        self._start_time = time.perf_counter()
+        self._imports = []
+        self._phases = []
+        self._import_depth = 0
+        self._reported = False
+        self._original_import = None
+
+    def install_import_hook(self):
+        """Measures time of every import which loads new modules. Nested imports are included in parent's time."""
+        if self.enabled and not self._original_import:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        label = self._get_import_label(name, fromlist, level)
+        if self._import_depth or not label:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._import_depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._import_depth -= 1
+            self._add_import(label, time.perf_counter() - start)
+
+    def _get_import_label(self, name, fromlist, level):
+        if level:
+            return None
+        if name not in sys.modules:
+            return name
+        for item in fromlist or ():
+            if item != '*' and '{}.{}'.format(name, item) not in sys.modules:
+                return '{}.{}'.format(name, item)
+        return None
+
+    def _add_import(self, name, duration):
+        if duration < self._MIN_IMPORT_SEC:
+            return
+        self._imports.append((name, duration))
+        if self._reported:
+            print('startup: import {} took {:.1f} ms'.format(name, duration * 1000), file=sys.stderr)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._phases.append((name, start - self._start_time, duration))
+            if self.enabled and self._reported:
+                print('startup: {} took {:.1f} ms'.format(name, duration * 1000), file=sys.stderr)
+
+    def report(self):
+        """Prints timings collected so far. Later phases are printed as they finish.
+        Returns False so it can be used as GLib idle callback."""
+        if not self.enabled or self._reported:
+            return False
+        self._reported = True
+        total = time.perf_counter() - self._start_time
+        lines = ['Startup report ({:.1f} ms until main loop):'.format(total * 1000), 'Phases:']
+        for name, offset, duration in self._phases:
+            lines.append('  {:<24} {:8.1f} ms (at {:.1f} ms)'.format(name, duration * 1000, offset * 1000))
+        lines.append('Imports:')
+        for name, duration in sorted(self._imports, key=lambda i: -i[1]):
+            lines.append('  {:<40} {:8.1f} ms'.format(name, duration * 1000))
+        print('\n'.join(lines), file=sys.stderr)
+        return False
+
+
+profiler = _StartupProfiler()
@@ -0,0 +1,101 @@
+import bisect
+import heapq
+
+
+class TradeStore:
+    """Time-ordered trade store with bounded retention.
+
+    Trades are kept sorted by (time, tid) so time range queries are done with bisect. Ranges of trade ids which were
+    already fetched are recorded so pages are never requested twice."""
+
+    def __init__(self):
+        self._keys = []
+        self._prices = []
+        self._amounts = []
+        self._tids = set()
+        # sorted, non-overlapping [first_tid, last_tid] ranges
+        self._fetched_ranges = []
+        # all trades since this time are stored (set by eviction of older trades)
+        self._complete_since = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def min_time(self):
+        return self._keys[0][0] if self._keys else None
+
+    @property
+    def min_tid(self):
+        return self._fetched_ranges[0][0] if self._fetched_ranges else None
+
+    @property
+    def max_tid(self):
+        return self._fetched_ranges[-1][1] if self._fetched_ranges else None
+
+    def covers(self, since_time):
+        """Returns True if no trades newer than since_time are missing before the oldest stored one, so older pages
+        do not have to be fetched"""
+        if self.min_time is None:
+            return False
+        if self.min_time <= since_time:
+            return True
+        return self._complete_since is not None and since_time >= self._complete_since
+
+    def add(self, trades):
+        """Adds trades given as (time, tid, price, amount) tuples. Already stored trades are ignored."""
+        new_trades = sorted(t for t in trades if t[1] not in self._tids)
+        if not new_trades:
+            return
+        self._tids.update(t[1] for t in new_trades)
+        if not self._keys or (new_trades[0][0], new_trades[0][1]) > self._keys[-1]:
+            self._keys.extend((t[0], t[1]) for t in new_trades)
+            self._prices.extend(t[2] for t in new_trades)
+            self._amounts.extend(t[3] for t in new_trades)
+        else:
+            stored = zip(self._keys, self._prices, self._amounts)
+            merged = heapq.merge(stored, (((t[0], t[1]), t[2], t[3]) for t in new_trades))
+            self._keys, self._prices, self._amounts = (list(c) for c in zip(*merged))
+
+    def add_fetched_range(self, first_tid, last_tid):
+        ranges = self._fetched_ranges
+        i = bisect.bisect_left(ranges, [first_tid, first_tid])
+        # merge with overlapping or adjacent neighbours
+        if i > 0 and ranges[i - 1][1] >= first_tid - 1:
+            i -= 1
+            first_tid = ranges[i][0]
+        j = i
+        while j < len(ranges) and ranges[j][0] <= last_tid + 1:
+            last_tid = max(last_tid, ranges[j][1])
+            j += 1
+        ranges[i:j] = [[first_tid, last_tid]]
+
+    def next_missing_tid(self, tid):
+        """Returns first tid greater or equal to given one which was not fetched yet"""
+        i = bisect.bisect_right(self._fetched_ranges, [tid, float('inf')])
+        if i > 0 and self._fetched_ranges[i - 1][1] >= tid:
+            return self._fetched_ranges[i - 1][1] + 1
+        return tid
+
+    def range(self, since_time, until_time=None):
+        """Returns (times, prices, amounts) lists of trades with since_time <= time < until_time"""
+        start = bisect.bisect_left(self._keys, (since_time,))
+        stop = bisect.bisect_left(self._keys, (until_time,)) if until_time is not None else len(self._keys)
+        times = [k[0] for k in self._keys[start:stop]]
+        return times, self._prices[start:stop], self._amounts[start:stop]
+
+    def evict(self, min_time):
+        """Removes trades older than min_time together with their fetched tid ranges"""
+        count = bisect.bisect_left(self._keys, (min_time,))
+        if not count:
+            return
+        evicted_tids = [k[1] for k in self._keys[:count]]
+        self._tids.difference_update(evicted_tids)
+        del self._keys[:count], self._prices[:count], self._amounts[:count]
+        max_evicted_tid = max(evicted_tids)
+        ranges = [r for r in self._fetched_ranges if r[1] > max_evicted_tid]
+        # remaining trades are complete down to min_time only if they directly follow evicted ones
+        self._complete_since = min_time if ranges and ranges[0][0] <= max_evicted_tid else None
+        if ranges and ranges[0][0] <= max_evicted_tid:
+            ranges[0] = [max_evicted_tid + 1, ranges[0][1]]
+        self._fetched_ranges = ranges
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from btcwidget.config import config
+from btcwidget.metrics import registry
+
+_request_seconds = registry.histogram('btcwidget_http_request_seconds', 'HTTP request duration until response body '
+                                      'is available (headers only for streamed responses)', ['host'])
+_errors = registry.counter('btcwidget_http_errors_total', 'Failed HTTP requests by error kind (timeout, connection, '
+                           'status)', ['host', 'error'])
+
+# Latency breakdown of a single request (seconds):
+# 'connect' - TCP + TLS handshake (0 if pooled connection was reused)
+# 'wait' - time to response headers, excluding connect
+# 'transfer' - body download
+RequestTiming = namedtuple('RequestTiming', ['connect', 'wait', 'transfer', 'total'])
+
+# connect time is measured inside urllib3 connection objects which run in the requesting thread
+_local = threading.local()
+
+
+def _add_connect_time(sec):
+    _local.connect_sec = getattr(_local, 'connect_sec', 0.0) + sec
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            HTTPConnection.connect(self)
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            HTTPSConnection.connect(self)
+        finally:
+            _add_connect_time(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+class _HttpTransport:
+    """Keeps one pooled keep-alive session per exchange host"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {}
+        self._redirects = {}
+
+    def _get_session(self, host):
+        pool_size = config['http_pool_size']
+        with self._lock:
+            session, session_pool_size = self._sessions.get(host, (None, None))
+            if session_pool_size != pool_size:
+                if session:
+                    session.close()
+                session = requests.Session()
+                adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session, pool_size
+            return session
+
+    def get(self, url, params=None, stream=False):
+        """Sends GET request. Returned response has additional 'timing' attribute (RequestTiming).
+        If stream is True body is not downloaded yet so transfer time is not included."""
+        url_parts = urlsplit(url)
+        host = url_parts.hostname
+        if host in self._redirects:
+            scheme, netloc = self._redirects[host]
+            url = urlunsplit((scheme, netloc) + tuple(url_parts[2:]))
+        session = self._get_session(host)
+        timeout = (config['http_connect_timeout_sec'], config['http_read_timeout_sec'])
+
+        _local.connect_sec = 0.0
+        start = time.perf_counter()
+        try:
+            resp = session.get(url, params=params, timeout=timeout, stream=stream)
+        except requests.exceptions.Timeout:
+            _errors.inc(host=host, error='timeout')
+            raise
+        except requests.exceptions.ConnectionError:
+            _errors.inc(host=host, error='connection')
+            raise
+        total = time.perf_counter() - start
+        _request_seconds.observe(total, host=host)
+        if resp.status_code >= 400:
+            _errors.inc(host=host, error='status')
+
+        connect = _local.connect_sec
+        headers = resp.elapsed.total_seconds()
+        resp.timing = RequestTiming(connect, max(headers - connect, 0.0), max(total - headers, 0.0), total)
+        self._update_stats(host, resp.timing)
+        return resp
+
+    def redirect(self, host, base_url):
+        """Sends requests for given host to base_url (scheme and address only) instead, e.g. to local replay server"""
+        base_parts = urlsplit(base_url)
+        self._redirects[host] = base_parts.scheme, base_parts.netloc
+
+    def _update_stats(self, host, timing):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'requests': 0,
+                'connections': 0,
+                'connect_sec': 0.0,
+                'wait_sec': 0.0,
+                'transfer_sec': 0.0,
+            })
+            stats['requests'] += 1
+            if timing.connect > 0:
+                stats['connections'] += 1
+            stats['connect_sec'] += timing.connect
+            stats['wait_sec'] += timing.wait
+            stats['transfer_sec'] += timing.transfer
+
+    def stats(self):
+        """Returns dict of accumulated per-host latency totals"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def close(self):
+        with self._lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+transport = _HttpTransport()
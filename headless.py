@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Runs polling engine without GTK and writes ticker, graph and alarm records as JSON lines.
+Engine input can be recorded to log file and replayed later instead of polling exchanges."""
+import argparse
+import sys
+
+import btcwidget.currency
+import btcwidget.metrics
+from btcwidget.config import config
+from btcwidget.logic import UpdateThread
+from btcwidget.replay import LogWriter, ReplayThread
+from btcwidget.sinks import FileSink, JsonLinesSink, MultiSink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stdout', action='store_true', help='write records to standard output (default)')
+    parser.add_argument('--file', action='append', default=[], help='append records to file')
+    parser.add_argument('--record', metavar='LOG', help='append ticks and graph data to replay log')
+    parser.add_argument('--replay', metavar='LOG', help='replay log instead of polling exchanges')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='replay speed factor, 0 for as fast as possible (default: 1)')
+    args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error('--record and --replay cannot be used together')
+
+    thread = None
+
+    def clock():
+        # records are stamped with time of engine data (recorded time in replay)
+        return thread.data_time()
+
+    sinks = [FileSink(path, clock) for path in args.file]
+    if args.stdout or not sinks:
+        sinks.append(JsonLinesSink(sys.stdout, clock))
+        # keep diagnostic prints out of records stream
+        sys.stdout = sys.stderr
+
+    config.load()
+    btcwidget.currency.service.start(refresh=not args.replay)
+    btcwidget.metrics.registry.start_server()
+    recorder = LogWriter(args.record) if args.record else None
+    if args.replay:
+        thread = ReplayThread(MultiSink(sinks), args.replay, args.speed)
+    else:
+        thread = UpdateThread(MultiSink(sinks), recorder)
+    try:
+        thread.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder:
+            recorder.close()
+
+
+if __name__ == '__main__':
+    main()
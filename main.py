@@ -1,20 +1,34 @@
 #!/usr/bin/env python3
+from btcwidget.startup import profiler
+profiler.install_import_hook()
+
 import gi, signal
 
 gi.require_version('Gtk', '3.0')
-from gi.repository import GObject, Gtk
+from gi.repository import GLib, GObject, Gtk
 
-from btcwidget.mainwindow import MainWindow
+import btcwidget.currency
+import btcwidget.metrics
+from btcwidget.mainwindow import MainWindow, GtkSink
 from btcwidget.logic import UpdateThread
 from btcwidget.config import config
 
 
 def main():
-    config.load()
+    with profiler.phase('config'):
+        config.load()
+        btcwidget.currency.service.start()
+        btcwidget.metrics.registry.start_server()
     GObject.threads_init()
-    main_win = MainWindow()
-    thread = UpdateThread(main_win)
-    thread.start()
+    with profiler.phase('main window'):
+        main_win = MainWindow()
+    with profiler.phase('update thread'):
+        thread = UpdateThread(GtkSink(main_win))
+        thread.start()
+    if not config['start_minimized']:
+        # show window after indicator is displayed and polling has started
+        GLib.idle_add(main_win.present)
+    GLib.idle_add(profiler.report)
     signal.signal(signal.SIGINT, signal.SIG_DFL)
     Gtk.main()
 
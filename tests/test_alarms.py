@@ -0,0 +1,38 @@
+import unittest
+
+from btcwidget.alarms import _AlarmIndex
+from btcwidget.config import config
+
+
+def _alarm(alarm_type, price, market='BTCUSD'):
+    return {'exchange': 'mock', 'market': market, 'type': alarm_type, 'price': price}
+
+
+class AlarmIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self._saved_alarms = config['alarms']
+        self.index = _AlarmIndex()
+
+    def tearDown(self):
+        config['alarms'] = self._saved_alarms
+
+    def test_pop_triggered(self):
+        above, below = _alarm('A', 110), _alarm('B', 90)
+        self.index.replace([above, below, _alarm('A', 120), _alarm('A', 100, 'BTCEUR')])
+        self.assertEqual(self.index.pop_triggered('mock', 'BTCUSD', 100), [])
+        self.assertEqual(self.index.pop_triggered('mock', 'BTCUSD', 115), [above])
+        self.assertEqual(self.index.pop_triggered('mock', 'BTCUSD', 85), [below])
+        self.assertEqual(len(config['alarms']), 2)
+
+    def test_replace(self):
+        self.index.replace([_alarm('A', 110)])
+        alarm = _alarm('B', 90)
+        self.index.replace([alarm])
+        self.assertEqual(config['alarms'], [alarm])
+        self.assertEqual(self.index.pop_triggered('mock', 'BTCUSD', 200), [])
+        self.assertEqual(self.index.pop_triggered('mock', 'BTCUSD', 80), [alarm])
+
+
+if __name__ == '__main__':
+    unittest.main()
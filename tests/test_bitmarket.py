@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from btcwidget.exchanges.bitmarket import BitMarketExchangeProvider
+
+
+class BitMarketGraphTest(unittest.TestCase):
+
+    def _graph(self, columns, since=None):
+        provider = BitMarketExchangeProvider()
+        columns = [np.array(column, dtype=float) for column in columns]
+        with mock.patch.object(provider, '_get_json_columns', return_value=columns):
+            return provider.graph('BTCPLN', 3600, 200, since)
+
+    def test_empty_payload(self):
+        self.assertEqual(len(self._graph([[], [], []])), 0)
+        self.assertEqual(len(self._graph([[], [], []], since=100)), 0)
+
+    def test_period_and_since(self):
+        columns = [[0, 1800, 3600, 5400], [1, 2, 3, 4], [2, 3, 4, 5]]
+        np.testing.assert_array_equal(self._graph(columns).time, [3600, 5400])
+        series = self._graph(columns, since=3600)
+        np.testing.assert_array_equal(series.time, [3600, 5400])
+        np.testing.assert_array_equal(series.close, [4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from btcwidget.candlecache import _CandleCache
+from btcwidget.series import Series
+
+
+def _candles(times):
+    times = np.array(times, dtype=float)
+    return Series.from_columns(times, times, times, times, times, np.ones(len(times)))
+
+
+class CandleCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = _CandleCache()
+        self.cache._PATH = os.path.join(self.dir, 'candles.cache.sqlite')
+
+    def tearDown(self):
+        if self.cache._db:
+            self.cache._db.close()
+        shutil.rmtree(self.dir)
+
+    def _count(self):
+        return self.cache._get_db().execute('SELECT COUNT(*) FROM candles').fetchone()[0]
+
+    def test_store_and_load(self):
+        self.cache.store('mock', 'BTCUSD', 60, _candles([0, 60, 120]), -1)
+        self.cache.store('mock', 'BTCUSD', 60, _candles([120, 180]), -1)
+        series = self.cache.load('mock', 'BTCUSD', 60, 0)
+        np.testing.assert_array_equal(series.time, [60, 120, 180])
+        self.assertEqual(len(self.cache.load('mock', 'BTCUSD', 300, -1)), 0)
+
+    def test_old_candles_of_all_resolutions_are_removed(self):
+        self.cache.store('mock', 'BTCUSD', 60, _candles([0, 60, 120]), -1)
+        self.cache.store('mock', 'BTCUSD', 300, _candles([0, 300]), 60)
+        np.testing.assert_array_equal(self.cache.load('mock', 'BTCUSD', 60, -1).time, [120])
+        np.testing.assert_array_equal(self.cache.load('mock', 'BTCUSD', 300, -1).time, [300])
+
+    def test_maintenance_removes_old_candles_of_other_markets(self):
+        self.cache.store('mock', 'BTCEUR', 60, _candles([0, 60]), -1)
+        self.cache.store('mock', 'BTCUSD', 60, _candles([0, 60]), 0)
+        # maintenance already ran on first store
+        self.assertEqual(self._count(), 3)
+        self.cache._maintenance_time = 0
+        self.cache.store('mock', 'BTCUSD', 60, _candles([120]), 0)
+        self.assertEqual(self._count(), 3)
+        np.testing.assert_array_equal(self.cache.load('mock', 'BTCEUR', 60, -1).time, [60])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from btcwidget.config import _Config
+
+
+def _market(exchange, market):
+    return {'exchange': exchange, 'market': market, 'ticker': True, 'graph': True, 'indicator': False}
+
+
+class MarketIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = _Config()
+        self.config['markets'] = [_market('mock', 'BTCUSD'), _market('bitstamp.net', 'BTCUSD')]
+
+    def test_lookup(self):
+        market_config, i = self.config.get_market_by_id('bitstamp.net/BTCUSD')
+        self.assertIs(market_config, self.config['markets'][1])
+        self.assertEqual(i, 1)
+        self.assertIsNone(self.config.get_market_by_id('mock/BTCEUR'))
+
+    def test_markets_replaced(self):
+        self.config['markets'] = [_market('bitstamp.net', 'BTCUSD')]
+        self.assertEqual(self.config.get_market_by_id('bitstamp.net/BTCUSD')[1], 0)
+        self.assertIsNone(self.config.get_market_by_id('mock/BTCUSD'))
+
+    def test_markets_modified_in_place(self):
+        markets = self.config['markets']
+        markets.insert(0, _market('mock', 'BTCEUR'))
+        self.assertEqual(self.config.get_market_by_id('mock/BTCEUR')[1], 0)
+        self.assertEqual(self.config.get_market_by_id('bitstamp.net/BTCUSD')[1], 2)
+        del markets[1:]
+        self.assertIsNone(self.config.get_market_by_id('bitstamp.net/BTCUSD'))
+
+
+class SaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.config = _Config()
+        self.config.CONFIG_PATH = os.path.join(self.dir, 'config.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _read(self):
+        with open(self.config.CONFIG_PATH) as file:
+            return json.load(file)
+
+    def test_flush_writes_snapshot_taken_by_save(self):
+        self.config['alarms'] = [{'exchange': 'mock', 'market': 'BTCUSD', 'type': 'A', 'price': 100}]
+        self.config.save()
+        # not saved modification made while writer is waiting
+        self.config['alarms'].append({'exchange': 'mock', 'market': 'BTCUSD', 'type': 'B', 'price': 50})
+        self.config.flush()
+        self.assertEqual(len(self._read()['alarms']), 1)
+        self.assertEqual(os.listdir(self.dir), ['config.json'])
+
+    def test_flush_without_changes(self):
+        self.config.flush()
+        self.assertFalse(os.path.exists(self.config.CONFIG_PATH))
+
+
+if __name__ == '__main__':
+    unittest.main()
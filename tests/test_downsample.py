@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from btcwidget.downsample import m4_indices
+
+
+class M4IndicesTest(unittest.TestCase):
+
+    def test_few_points_are_kept(self):
+        np.testing.assert_array_equal(m4_indices(np.arange(10), np.arange(10), 5), np.arange(10))
+
+    def test_keeps_first_last_min_max_of_each_column(self):
+        x = np.arange(100)
+        y = np.zeros(100)
+        y[13] = 5
+        y[17] = -5
+        y[60] = np.nan
+        indices = m4_indices(x, y, 10)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertLessEqual(len(indices), 4 * 10)
+        for i in (0, 99, 13, 17):
+            self.assertIn(i, indices)
+        # every column has its first and last point
+        for column in range(10):
+            self.assertIn(column * 10, indices)
+            self.assertIn(column * 10 + 9, indices)
+
+    def test_single_x(self):
+        np.testing.assert_array_equal(m4_indices(np.zeros(50), np.arange(50), 2), [0, 49])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from btcwidget.jsonstream import iter_array, read_columns
+
+
+def _chunks(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class IterArrayTest(unittest.TestCase):
+
+    DOCUMENT = json.dumps([{'a': 1, 'b': '}{'}, [1, 2], 2.5, 'ż', None, True, {'c': {'d': []}}, -1e3])
+
+    def test_decodes_whole_document(self):
+        self.assertEqual(list(iter_array([self.DOCUMENT.encode('utf-8')])), json.loads(self.DOCUMENT))
+
+    def test_decodes_any_chunk_split(self):
+        expected = json.loads(self.DOCUMENT)
+        for size in range(1, 12):
+            self.assertEqual(list(iter_array(_chunks(self.DOCUMENT, size))), expected, 'chunk size {}'.format(size))
+
+    def test_number_split_between_chunks(self):
+        self.assertEqual(list(iter_array([b'[12', b'.5', b'e1, 3', b']'])), [125.0, 3])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_array([b' [ ', b' ] '])), [])
+
+    def test_failed_bulk_decoding_is_not_repeated(self):
+        records = ','.join('{"a":%d}' % i for i in range(1000))
+        for chunks in [
+            # '}' inside string of incomplete element
+            ['[' + records + ',{"a":"}', '"}]'],
+            # '}' of nested object in incomplete element
+            ['[' + records + ',{"a":{"b":1}', ',"c":2}]'],
+        ]:
+            with mock.patch('json.loads', wraps=json.loads) as loads:
+                values = list(iter_array(chunk.encode('utf-8') for chunk in chunks))
+            self.assertEqual(len(values), 1001)
+            self.assertLessEqual(loads.call_count, 3)
+
+    def test_malformed_element_is_not_decoded_in_bulk_repeatedly(self):
+        text = '[' + ','.join('{"a":%d}' % i for i in range(1000)) + ',{"a":x}]'
+        with mock.patch('json.loads', wraps=json.loads) as loads:
+            with self.assertRaises(ValueError):
+                list(iter_array([text.encode('utf-8')]))
+        self.assertLessEqual(loads.call_count, 1)
+
+    def test_stray_commas_rejected(self):
+        for text in ['[,1]', '[1,,2]', '[1,]', '[{"a":1},,{"a":2}]']:
+            with self.assertRaises(ValueError, msg=text):
+                list(iter_array([text.encode('utf-8')]))
+
+    def test_missing_comma_rejected(self):
+        with self.assertRaises(ValueError):
+            list(iter_array([b'[{"a":1}{"a":2}]']))
+
+    def test_not_array_rejected(self):
+        with self.assertRaises(ValueError):
+            list(iter_array([b'{"a":1}']))
+
+    def test_truncated_document_rejected(self):
+        with self.assertRaises(ValueError):
+            list(iter_array([b'[1, 2']))
+
+
+class ReadColumnsTest(unittest.TestCase):
+
+    def test_read_columns(self):
+        text = json.dumps([{'date': 1, 'price': '10.5'}, {'date': 2, 'price': 11}])
+        dates, prices = read_columns(_chunks(text, 7), ['date', 'price'])
+        np.testing.assert_array_equal(dates, [1, 2])
+        np.testing.assert_array_equal(prices, [10.5, 11])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from btcwidget.replay import LogWriter, read_log
+from btcwidget.series import Series
+
+
+class LogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _write(self, records):
+        writer = LogWriter(self.path)
+        for record in records:
+            if record[0] == 'ticker':
+                writer.ticker(*record[1:])
+            else:
+                writer.graph(*record[1:])
+        writer.close()
+
+    def test_round_trip(self):
+        series = Series.from_columns([0, 60], [1, 2], [3, 4], [0.5, 1.5], [2, 3], [10, 20])
+        self._write([['ticker', 1.5, 'mock/BTCUSD', 100.25], ['graph', 2.0, 'mock/BTCUSD', 60, series]])
+        ticker, graph = list(read_log(self.path))
+        self.assertEqual(ticker, ['ticker', 1.5, 'mock/BTCUSD', 100.25])
+        self.assertEqual(graph[:4], ['graph', 2.0, 'mock/BTCUSD', 60])
+        for column in Series.COLUMNS:
+            np.testing.assert_array_equal(getattr(graph[4], column), getattr(series, column))
+
+    def test_append_to_existing_log(self):
+        self._write([['ticker', 1, 'mock/BTCUSD', 1]])
+        self._write([['ticker', 2, 'mock/BTCUSD', 2]])
+        self.assertEqual([r[1] for r in read_log(self.path)], [1, 2])
+
+    def test_blocks(self):
+        writer = LogWriter(self.path)
+        writer.ticker(1, 'mock/BTCUSD', 1)
+        writer.flush()
+        writer.flush()
+        writer.ticker(2, 'mock/BTCUSD', 2)
+        writer.close()
+        self.assertEqual([r[1] for r in read_log(self.path)], [1, 2])
+
+    def test_truncated_block_is_skipped(self):
+        writer = LogWriter(self.path)
+        writer.ticker(1, 'mock/BTCUSD', 1)
+        writer.flush()
+        writer.ticker(2, 'mock/BTCUSD', 2)
+        writer.close()
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual([r[1] for r in read_log(self.path)], [1])
+
+    def test_not_a_log(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'something else')
+        with self.assertRaises(ValueError):
+            LogWriter(self.path)
+        with self.assertRaises(ValueError):
+            list(read_log(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
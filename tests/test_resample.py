@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from btcwidget.resample import ohlcv
+
+
+class OhlcvTest(unittest.TestCase):
+
+    def test_aggregates_trades_into_buckets(self):
+        candles = ohlcv([0, 5, 9, 10, 19], [10, 30, 20, 40, 50], [1, 1, 2, 1, 3], 10)
+        np.testing.assert_array_equal(candles.time, [0, 10])
+        np.testing.assert_array_equal(candles.open, [10, 40])
+        np.testing.assert_array_equal(candles.high, [30, 50])
+        np.testing.assert_array_equal(candles.low, [10, 40])
+        np.testing.assert_array_equal(candles.close, [20, 50])
+        np.testing.assert_array_equal(candles.volume, [4, 4])
+        np.testing.assert_allclose(candles.vwap, [(10 + 30 + 40) / 4, (40 + 150) / 4])
+
+    def test_fills_empty_buckets_with_previous_close(self):
+        candles = ohlcv([0, 35], [10, 20], [1, 1], 10)
+        np.testing.assert_array_equal(candles.time, [0, 10, 20, 30])
+        np.testing.assert_array_equal(candles.close, [10, 10, 10, 20])
+        np.testing.assert_array_equal(candles.open, [10, 10, 10, 20])
+        np.testing.assert_array_equal(candles.volume, [1, 0, 0, 1])
+
+    def test_sorts_unsorted_trades(self):
+        candles = ohlcv([9, 0], [20, 10], [1, 1], 10)
+        self.assertEqual(candles.open[0], 10)
+        self.assertEqual(candles.close[0], 20)
+
+    def test_empty(self):
+        candles = ohlcv([], [], [], 10)
+        self.assertEqual(len(candles.time), 0)
+        self.assertEqual(len(candles.to_series()), 0)
+
+    def test_to_series(self):
+        series = ohlcv([0, 15], [10, 20], [1, 2], 10).to_series()
+        np.testing.assert_array_equal(series.time, [0, 10])
+        np.testing.assert_array_equal(series.volume, [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+import numpy as np
+
+from btcwidget.rollup import CandlePyramid, aggregate
+from btcwidget.series import Series
+
+
+def _candles(start, count, step, volume=1.0):
+    times = start + np.arange(count) * step
+    prices = 100.0 + np.arange(count)
+    return Series.from_columns(times, prices, prices + 1, prices - 1, prices, np.full(count, volume))
+
+
+class AggregateTest(unittest.TestCase):
+
+    def test_aggregate(self):
+        series = aggregate(_candles(0, 6, 10), 30)
+        np.testing.assert_array_equal(series.time, [0, 30])
+        np.testing.assert_array_equal(series.open, [100, 103])
+        np.testing.assert_array_equal(series.high, [103, 106])
+        np.testing.assert_array_equal(series.low, [99, 102])
+        np.testing.assert_array_equal(series.close, [102, 105])
+        np.testing.assert_array_equal(series.volume, [3, 3])
+
+    def test_skips_empty_buckets(self):
+        series = aggregate(Series.from_columns([0, 100], close=[1, 2]), 30)
+        np.testing.assert_array_equal(series.time, [0, 90])
+
+
+class CandlePyramidTest(unittest.TestCase):
+
+    def test_ticks_are_rolled_up(self):
+        pyramid = CandlePyramid()
+        for t in range(0, 3600, 5):
+            pyramid.add_tick(t, 100.0 + t)
+        series = pyramid.get(3000, 300, 3600)
+        self.assertIsNotNone(series)
+        np.testing.assert_array_equal(series.time, np.arange(600, 3600, 300))
+        np.testing.assert_array_equal(series.close, np.arange(600, 3600, 300) + 395.0)
+
+    def test_get_uses_level_not_coarser_than_step(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 24, 3600), 3600)
+        series = pyramid.get(12 * 3600, 3600, 24 * 3600)
+        self.assertEqual(len(series), 12)
+        self.assertIsNone(pyramid.get(3600, 60, 24 * 3600))
+
+    def test_candles_are_not_stored_in_finer_levels(self):
+        pyramid = CandlePyramid()
+        # 18 s candles cross boundaries of 1 and 5 minute buckets
+        pyramid.add(_candles(0, 400, 18), 18)
+        self.assertIsNone(pyramid.get(3600, 60, 400 * 18))
+        self.assertIsNone(pyramid.get(3600, 300, 400 * 18))
+        series = pyramid.get(3600, 3600, 400 * 18)
+        np.testing.assert_array_equal(series.time, [3600])
+        np.testing.assert_array_equal(series.volume, [200])
+
+    def test_misaligned_candles_are_ignored(self):
+        pyramid = CandlePyramid()
+        # 50.4 minute candles do not fit into buckets of any level
+        pyramid.add(_candles(0, 100, 3024), 3024)
+        self.assertIsNone(pyramid.get(24 * 3600, 24 * 3600, 100 * 3024))
+        pyramid.add(_candles(30, 100, 60), 60)
+        self.assertIsNone(pyramid.get(3600, 60, 100 * 60))
+
+    def test_candle_step_is_derived_from_spacing(self):
+        pyramid = CandlePyramid()
+        # exchange returned 1 minute candles with some missing for 18 s graph step
+        times = np.r_[0:1800:60, 1920:3600:60]
+        pyramid.add(Series.from_columns(times, close=np.ones(len(times)), volume=np.ones(len(times))), 18)
+        # refetched last candle only
+        pyramid.add(Series.from_columns([3540], close=[2], volume=[3]), 18)
+        series = pyramid.get(3600, 60, 3600)
+        self.assertEqual(len(series), 58)
+        self.assertEqual(series.last_close(), 2)
+
+    def test_gaps_are_not_served(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 60, 60), 60)
+        pyramid.add(_candles(7200, 60, 60), 60)
+        self.assertIsNotNone(pyramid.get(3000, 60, 3600))
+        self.assertIsNotNone(pyramid.get(3000, 60, 3 * 3600))
+        self.assertIsNone(pyramid.get(3 * 3600, 3600, 3 * 3600))
+        # missing hour fetched later
+        pyramid.add(_candles(3600, 60, 60), 60)
+        self.assertIsNotNone(pyramid.get(3 * 3600, 3600, 3 * 3600))
+        # no data for last hour
+        self.assertIsNone(pyramid.get(3 * 3600, 3600, 4 * 3600))
+
+    def test_levels_are_updated_in_place(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 10, 60), 60)
+        pyramid.add_tick(600, 100)
+        buffers = [level._data for level in pyramid._levels]
+        for t in range(605, 1100, 5):
+            pyramid.add_tick(t, 100.0 + t)
+        for level, buffer in zip(pyramid._levels, buffers):
+            self.assertIs(level._data, buffer)
+        self.assertIsNotNone(pyramid.get(900, 60, 1100))
+
+    def test_candles_coarser_than_all_levels_are_ignored(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 10, 7 * 24 * 3600), 7 * 24 * 3600)
+        self.assertIsNone(pyramid.get(30 * 24 * 3600, 24 * 3600, 70 * 24 * 3600))
+
+    def test_readding_rows_does_not_inflate_volume(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 30, 60), 60)
+        for _ in range(3):
+            # overlapping update starting in the middle of 5 minute and hour buckets
+            pyramid.add(_candles(25 * 60, 5, 60), 60)
+        hour = pyramid.get(3600, 3600, 1800)
+        np.testing.assert_array_equal(hour.volume, [30])
+        five_minutes = pyramid.get(1800, 300, 1800)
+        np.testing.assert_array_equal(five_minutes.volume, np.full(6, 5))
+
+    def test_retention(self):
+        pyramid = CandlePyramid()
+        pyramid.add(_candles(0, 2 * 24 * 60, 60), 60)
+        self.assertIsNone(pyramid.get(36 * 3600, 60, 2 * 24 * 3600))
+        self.assertIsNotNone(pyramid.get(36 * 3600, 300, 2 * 24 * 3600))
+
+
+if __name__ == '__main__':
+    unittest.main()
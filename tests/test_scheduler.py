@@ -0,0 +1,98 @@
+import email.utils
+import time
+import types
+import unittest
+from unittest import mock
+
+from btcwidget.scheduler import PollScheduler, _get_retry_after
+
+EXCHANGE = 'mock'
+
+
+def _http_error(status_code, retry_after=None):
+    error = Exception()
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    error.response = types.SimpleNamespace(status_code=status_code, headers=headers)
+    return error
+
+
+class PollSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = PollScheduler()
+        self.key = ('ticker', EXCHANGE + '/BTCUSD')
+
+    def test_due_schedules_next_poll(self):
+        self.assertTrue(self.scheduler.due(self.key, EXCHANGE, 60))
+        self.assertFalse(self.scheduler.due(self.key, EXCHANGE, 60))
+        self.assertTrue(self.scheduler.due(('ticker', EXCHANGE + '/BTCEUR'), EXCHANGE, 60))
+
+    def test_reset(self):
+        other_key = ('ticker', EXCHANGE + '/BTCEUR')
+        for key in (self.key, other_key):
+            self.scheduler.due(key, EXCHANGE, 60)
+        self.scheduler.reset('ticker', self.key[1])
+        self.assertTrue(self.scheduler.due(self.key, EXCHANGE, 60))
+        self.assertFalse(self.scheduler.due(other_key, EXCHANGE, 60))
+        self.scheduler.reset('ticker')
+        self.assertTrue(self.scheduler.due(other_key, EXCHANGE, 60))
+
+    def test_budget_limits_requests(self):
+        keys = [('ticker', EXCHANGE + '/{}'.format(i)) for i in range(150)]
+        with mock.patch('time.time', return_value=1000.0) as clock:
+            # 600 requests per minute with 10 s burst
+            results = [self.scheduler.due(key, EXCHANGE, 60) for key in keys]
+            self.assertEqual(results.count(True), 100)
+            # budget is refilled at 10 requests per second
+            clock.return_value = 1001.0
+            results = [self.scheduler.due(key, EXCHANGE, 60) for key in keys[100:]]
+            self.assertEqual(results.count(True), 10)
+
+    def test_error_backs_off_whole_exchange(self):
+        self.scheduler.on_error(self.key, EXCHANGE, Exception())
+        self.assertFalse(self.scheduler.due(self.key, EXCHANGE, 60))
+        self.assertFalse(self.scheduler.due(('ticker', EXCHANGE + '/BTCEUR'), EXCHANGE, 60))
+        self.assertTrue(self.scheduler.due(('ticker', 'bitstamp.net/BTCUSD'), 'bitstamp.net', 60))
+
+    def test_backoff_honors_retry_after(self):
+        self.scheduler.on_error(self.key, EXCHANGE, _http_error(429, '120'))
+        self.assertGreaterEqual(self.scheduler._backoff_until[EXCHANGE], time.time() + 119)
+
+    def test_adapts_interval_to_price_moves(self):
+        self.scheduler.on_success(self.key, EXCHANGE, 60, {self.key[1]: 100.0})
+        self.scheduler.on_success(self.key, EXCHANGE, 60, {self.key[1]: 110.0})
+        self.assertEqual(self.scheduler._factors[self.key], 0.5)
+        self.scheduler.on_success(self.key, EXCHANGE, 60, {self.key[1]: 110.0})
+        self.assertEqual(self.scheduler._factors[self.key], 0.625)
+
+    def test_remove_drops_last_price_with_last_key(self):
+        graph_key = ('graph', self.key[1])
+        self.scheduler.due(self.key, EXCHANGE, 60)
+        self.scheduler.due(graph_key, EXCHANGE, 60)
+        self.scheduler.on_success(self.key, EXCHANGE, 60, {self.key[1]: 100.0})
+        self.scheduler.remove(self.key)
+        self.assertIn(self.key[1], self.scheduler._last_prices)
+        self.scheduler.remove(graph_key)
+        self.assertNotIn(self.key[1], self.scheduler._last_prices)
+        self.assertNotIn(self.key, self.scheduler._factors)
+
+
+class RetryAfterTest(unittest.TestCase):
+
+    def test_seconds(self):
+        self.assertEqual(_get_retry_after(_http_error(429, '30')), 30)
+        self.assertEqual(_get_retry_after(_http_error(503, '-5')), 0)
+
+    def test_http_date(self):
+        value = email.utils.formatdate(time.time() + 100, usegmt=True)
+        self.assertAlmostEqual(_get_retry_after(_http_error(503, value)), 100, delta=2)
+
+    def test_not_given(self):
+        self.assertIsNone(_get_retry_after(Exception()))
+        self.assertIsNone(_get_retry_after(_http_error(500, '30')))
+        self.assertIsNone(_get_retry_after(_http_error(429)))
+        self.assertIsNone(_get_retry_after(_http_error(429, 'soon')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from btcwidget.series import Series
+
+
+def _series(times, closes=None):
+    return Series.from_columns(times, close=closes if closes is not None else times)
+
+
+class SeriesTest(unittest.TestCase):
+
+    def test_from_columns_sorts_rows_and_derives_prices(self):
+        series = Series.from_columns([3, 1, 2], close=[30, 10, 20])
+        np.testing.assert_array_equal(series.time, [1, 2, 3])
+        np.testing.assert_array_equal(series.open, [10, 20, 30])
+        np.testing.assert_array_equal(series.high, [10, 20, 30])
+        np.testing.assert_array_equal(series.volume, [0, 0, 0])
+
+    def test_from_records(self):
+        series = Series.from_records([{'time': 1, 'close': 5, 'volume': 2}])
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series.last_close(), 5)
+        self.assertEqual(series.volume[0], 2)
+        self.assertEqual(len(Series.from_records([])), 0)
+
+    def test_append_grows_capacity(self):
+        series = Series(capacity=1)
+        for i in range(100):
+            series.append(i, i, i, i, i)
+        self.assertEqual(len(series), 100)
+        self.assertEqual(series.last_time(), 99)
+
+    def test_trim_and_truncate(self):
+        series = _series([1, 2, 3, 4, 5])
+        series.trim(2)
+        np.testing.assert_array_equal(series.time, [3, 4, 5])
+        series.truncate(5)
+        np.testing.assert_array_equal(series.time, [3, 4])
+
+    def test_merge_replaces_overlapping_rows(self):
+        series = _series([1, 2, 3], [1, 2, 3])
+        series.merge(_series([2, 4], [20, 40]))
+        np.testing.assert_array_equal(series.time, [1, 2, 4])
+        np.testing.assert_array_equal(series.close, [1, 20, 40])
+
+    def test_view_is_not_changed_by_later_modifications(self):
+        series = _series([1, 2, 3])
+        view = series.view()
+        series.truncate(2)
+        series.extend([2, 3], close=[200, 300])
+        series.trim(2)
+        np.testing.assert_array_equal(view.time, [1, 2, 3])
+        np.testing.assert_array_equal(view.close, [1, 2, 3])
+        np.testing.assert_array_equal(series.close, [300])
+
+    def test_tail_copies_rows_without_exposing_them(self):
+        series = _series([1, 2, 3], [10, 20, 30])
+        buffer = series._data
+        tail = series.tail(2)
+        np.testing.assert_array_equal(tail.close, [20, 30])
+        self.assertEqual(series.first_time(), 1)
+        series.merge(_series([3], [300]))
+        # replaced in place, tail keeps old values
+        self.assertIs(series._data, buffer)
+        np.testing.assert_array_equal(tail.close, [20, 30])
+
+    def test_version_changes_only_on_modification(self):
+        series = _series([1, 2, 3])
+        version = series.version
+        series.trim(0)
+        series.truncate(10)
+        self.assertEqual(series.version, version)
+        self.assertEqual(series.view().version, version)
+        series.trim(1)
+        self.assertNotEqual(series.version, version)
+        self.assertNotEqual(Series().version, Series().version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+import btcwidget.currency
+from btcwidget.series import Series
+from btcwidget.spread import SpreadEngine
+
+USD = 'bitstamp.net/BTCUSD'
+PLN = 'bitbay.net/BTCPLN'
+MOCK = 'mock/BTCUSD'
+
+
+class SpreadEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        btcwidget.currency.service._set_data({'base': 'USD', 'rates': {'PLN': 4.0}})
+        self.engine = SpreadEngine('BTCUSD', [USD, 'spread/BTCUSD', 'bitstamp.net/LTCUSD', PLN, MOCK])
+
+    def test_sources(self):
+        self.assertEqual(self.engine.source_ids, [USD, PLN, MOCK])
+        self.assertIsNone(self.engine.update('bitstamp.net/LTCUSD', 100))
+
+    def test_update_normalizes_prices(self):
+        self.assertIsNone(self.engine.update(USD, 1000))
+        self.assertEqual(self.engine.update(PLN, 4200), 50)
+        self.assertEqual(self.engine.update(MOCK, 990), 60)
+        self.assertEqual(self.engine.best_venues(), (MOCK, PLN))
+
+    def test_details(self):
+        self.assertIsNone(self.engine.details())
+        self.engine.update(USD, 1000)
+        self.engine.update(PLN, 4200)
+        self.engine.update(MOCK, 990)
+        self.assertEqual(self.engine.details(), {
+            'buy': MOCK,
+            'sell': PLN,
+            'pairs': [[MOCK, PLN, 60.0], [USD, PLN, 50.0], [MOCK, USD, 10.0]],
+        })
+
+    def test_history(self):
+        graphs = {
+            USD: Series.from_columns([0, 60, 120], close=[1000, 1010, 1020]),
+            PLN: Series.from_columns([0, 120], close=[4200, 4000]),
+        }
+        history = self.engine.history(graphs, 60, 0, 3600)
+        np.testing.assert_array_equal(history.time, [0, 60, 120])
+        # PLN market keeps its price between candles
+        np.testing.assert_array_equal(history.close, [50, 40, 20])
+
+    def test_history_drops_stale_prices(self):
+        graphs = {
+            USD: Series.from_columns([0, 60, 120, 180], close=[1000, 1010, 1020, 1030]),
+            PLN: Series.from_columns([0], close=[4200]),
+        }
+        history = self.engine.history(graphs, 60, 0, 60)
+        np.testing.assert_array_equal(history.time, [0, 60])
+        np.testing.assert_array_equal(history.close, [50, 40])
+
+    def test_history_needs_two_sources(self):
+        self.assertEqual(len(self.engine.history({USD: Series.from_columns([0], close=[1])}, 60, 0, 60)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
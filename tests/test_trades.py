@@ -0,0 +1,71 @@
+import unittest
+
+from btcwidget.trades import TradeStore
+
+
+def _trades(first_tid, last_tid, time_offset=1000):
+    """Trades with one trade per second, time = tid + time_offset"""
+    return [(tid + time_offset, tid, 100.0 + tid, 1.0) for tid in range(first_tid, last_tid + 1)]
+
+
+class TradeStoreTest(unittest.TestCase):
+
+    def _store(self, first_tid, last_tid):
+        store = TradeStore()
+        store.add(_trades(first_tid, last_tid))
+        store.add_fetched_range(first_tid, last_tid)
+        return store
+
+    def test_add_ignores_duplicates_and_keeps_order(self):
+        store = self._store(10, 19)
+        store.add(_trades(5, 12))
+        self.assertEqual(len(store), 15)
+        times, prices, amounts = store.range(0)
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(store.min_time, 1005)
+
+    def test_range(self):
+        store = self._store(1, 10)
+        times, prices, _ = store.range(1003, 1005)
+        self.assertEqual(times, [1003, 1004])
+        self.assertEqual(prices, [103.0, 104.0])
+
+    def test_fetched_ranges_are_merged(self):
+        store = self._store(1, 10)
+        store.add_fetched_range(20, 30)
+        store.add_fetched_range(11, 19)
+        self.assertEqual(store.min_tid, 1)
+        self.assertEqual(store.max_tid, 30)
+        self.assertEqual(store.next_missing_tid(5), 31)
+
+    def test_next_missing_tid_skips_fetched_pages(self):
+        store = self._store(1, 10)
+        store.add_fetched_range(21, 30)
+        self.assertEqual(store.next_missing_tid(3), 11)
+        self.assertEqual(store.next_missing_tid(15), 15)
+        self.assertEqual(store.next_missing_tid(21), 31)
+
+    def test_evict(self):
+        store = self._store(1, 10)
+        store.evict(1005)
+        self.assertEqual(store.min_time, 1005)
+        self.assertEqual(store.min_tid, 5)
+        # evicted trades can be added again
+        store.add(_trades(1, 4))
+        self.assertEqual(len(store), 10)
+
+    def test_covers_after_eviction(self):
+        store = self._store(1, 10)
+        self.assertTrue(store.covers(1003))
+        self.assertFalse(store.covers(1000))
+        store.evict(1004.5)
+        # oldest remaining trade is newer than cutoff but nothing newer than cutoff is missing
+        self.assertTrue(store.covers(1004.5))
+        self.assertFalse(store.covers(1004))
+
+    def test_covers_empty_store(self):
+        self.assertFalse(TradeStore().covers(0))
+
+
+if __name__ == '__main__':
+    unittest.main()